@@ -1,3 +1,171 @@
-from pymongo import MongoClient
+import os
+import threading
+from pymongo import MongoClient, monitoring
+from pymongo.read_preferences import ReadPreference
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
 
-conn= MongoClient()  #connecting to the server
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+_client = None
+_databases = {}
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    # Counts open and checked-out connections per server pool of this process. Each server
+    # (primary, every secondary) has its own pool of up to MONGO_MAX_POOL_SIZE connections.
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._pools = {}  # "host:port" -> {"open": n, "checked_out": n}
+
+    def _add(self, address, open=0, checked_out=0):
+        with self._mutex:
+            pool = self._pools.setdefault(f"{address[0]}:{address[1]}", {"open": 0, "checked_out": 0})
+            pool["open"] += open
+            pool["checked_out"] += checked_out
+
+    def connection_created(self, event):
+        self._add(event.address, open=1)
+
+    def connection_closed(self, event):
+        self._add(event.address, open=-1)
+
+    def connection_checked_out(self, event):
+        self._add(event.address, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(event.address, checked_out=-1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        # The server left the topology; its connections are gone with it
+        with self._mutex:
+            self._pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pass
+
+    def reset(self):
+        with self._mutex:
+            self._pools.clear()
+
+    def stats(self) -> dict:
+        max_size = settings.MONGO_MAX_POOL_SIZE
+        with self._mutex:
+            servers = {
+                address: {**pool, "available": pool["open"] - pool["checked_out"]}
+                for address, pool in self._pools.items()
+            }
+        return {
+            "max_size": max_size,
+            "open": sum(pool["open"] for pool in servers.values()),
+            "checked_out": sum(pool["checked_out"] for pool in servers.values()),
+            "available": sum(pool["available"] for pool in servers.values()),
+            # Only a single pool at its own limit makes requests wait; 0 means unlimited
+            "exhausted": sorted(address for address, pool in servers.items() if max_size and pool["checked_out"] >= max_size),
+            "servers": servers,
+        }
+
+
+pool_monitor = PoolMonitor()
+
+
+def client_options() -> dict:
+    options = {
+        "appname": settings.MONGO_APP_NAME,
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [pool_monitor],
+        "w": int(settings.MONGO_WRITE_CONCERN) if settings.MONGO_WRITE_CONCERN.isdigit() else settings.MONGO_WRITE_CONCERN,
+    }
+    # 0 means "no timeout" here, which pymongo expresses by leaving the option out
+    if settings.MONGO_SOCKET_TIMEOUT_MS:
+        options["socketTimeoutMS"] = settings.MONGO_SOCKET_TIMEOUT_MS
+    if settings.MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    if settings.MONGO_JOURNAL:
+        options["journal"] = True
+    return options
+
+
+def get_client() -> MongoClient:
+    global _client
+    if _client is None:
+        _client = MongoClient(settings.MONGO_URI, **client_options())  #connecting to the server
+    return _client
+
+
+def get_database():
+    if "primary" not in _databases:
+        _databases["primary"] = get_client().get_database(settings.MONGO_DB)
+    return _databases["primary"]
+
+
+def get_read_database():
+    # Used by GET endpoints; may read from secondaries depending on MONGO_READ_PREFERENCE
+    if "read" not in _databases:
+        _databases["read"] = get_client().get_database(
+            settings.MONGO_DB, read_preference=READ_PREFERENCES[settings.MONGO_READ_PREFERENCE]
+        )
+    return _databases["read"]
+
+
+class _Lazy:
+    # Stands in for a client or database until first use, so every worker process (spawned
+    # or forked) builds its own client and connection pool instead of inheriting the parent's
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+    def __getitem__(self, name):
+        return self._factory()[name]
+
+
+conn = _Lazy(get_client)
+db = _Lazy(get_database)
+read_db = _Lazy(get_read_database)
+
+
+def _reset_after_fork():
+    # MongoClient is not fork-safe; a forked child must open its own connections
+    global _client
+    _client = None
+    _databases.clear()
+    pool_monitor.reset()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def warm_up_pool(connections: int):
+    # Concurrent pings force the pool to open that many sockets before traffic arrives
+    conn.admin.command("ping")
+    if connections > 1:
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(lambda _: conn.admin.command("ping"), range(connections)))
@@ -0,0 +1,45 @@
+import logging
+from pymongo.errors import OperationFailure
+from config.db import db
+from utils.idempotency import idempotency_store
+from utils.audit import audit_log
+from utils import soft_delete
+from utils.jobs import job_queue
+from utils.emails import NORMALIZED_INDEX_OPTIONS
+from utils.rate_limit import login_limiter, MongoStore
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _create_index(collection, keys, **options):
+    try:
+        collection.create_index(keys, **options)
+    except OperationFailure as e:
+        if not options.get("unique"):
+            raise
+        # Existing duplicates block a unique index; keep lookups fast until the data is cleaned up
+        logger.warning("Could not create unique index %s on %s: %s", keys, collection.name, e)
+        options.pop("unique")
+        options["name"] = f"{collection.name}_{'_'.join(key for key, _ in keys)}_nonunique"
+        collection.create_index(keys, **options)
+
+
+def ensure_indexes():
+    # Every lookup the routes make is by id or email
+    for collection in (db.user, db.members):
+        _create_index(collection, [("id", 1)], unique=True)
+        _create_index(collection, [("email", 1)], unique=True)
+        # Case-insensitive lookups and email prefix search
+        _create_index(collection, [("email_normalized", 1)], **NORMALIZED_INDEX_OPTIONS)
+        # Search: prefix on name, exact or $in on location and mobile number
+        _create_index(collection, [("name", 1)])
+        _create_index(collection, [("location", 1), ("name", 1)])
+        _create_index(collection, [("mobile_number", 1)])
+
+    soft_delete.ensure_indexes()
+    idempotency_store.ensure_indexes()
+    audit_log.ensure_collection()
+    job_queue.ensure_indexes()
+    if isinstance(login_limiter.store, MongoStore):
+        login_limiter.store.ensure_indexes(settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS)
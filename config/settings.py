@@ -0,0 +1,157 @@
+import os
+
+# All settings are read from the environment so each deployment can tune them
+
+# bcrypt work factor. When BCRYPT_TARGET_MS is set the cost is calibrated at startup
+# to the highest value whose hash time stays within the target, bounded by the min/max.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "0"))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
+
+# Login rate limiting. Failed attempts are counted per email and per client IP over a
+# sliding window; going over the limit locks the key out, doubling the lockout each time.
+# LOGIN_RATE_LIMIT_STORE=mongo shares counters between workers through MongoDB.
+LOGIN_RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("LOGIN_RATE_LIMIT_WINDOW_SECONDS", "60"))
+LOGIN_RATE_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", "5"))
+LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "30"))
+LOGIN_LOCKOUT_SECONDS = float(os.getenv("LOGIN_LOCKOUT_SECONDS", "30"))
+LOGIN_LOCKOUT_MAX_SECONDS = float(os.getenv("LOGIN_LOCKOUT_MAX_SECONDS", "900"))
+LOGIN_RATE_LIMIT_STORE = os.getenv("LOGIN_RATE_LIMIT_STORE", "memory")
+
+# Short-lived cache of successful password verifications. Disabled when the TTL is 0.
+# Entries are keyed by an HMAC so neither plaintext nor hashes are kept in memory.
+LOGIN_CACHE_TTL_SECONDS = float(os.getenv("LOGIN_CACHE_TTL_SECONDS", "0"))
+LOGIN_CACHE_MAX_ENTRIES = int(os.getenv("LOGIN_CACHE_MAX_ENTRIES", "10000"))
+LOGIN_CACHE_SECRET = os.getenv("LOGIN_CACHE_SECRET", "")
+
+# Threads used for bcrypt work; 0 means one per CPU core
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "0"))
+
+# Per-route concurrency caps as "METHOD PATH=max_concurrent:max_queued" entries separated
+# by commas; a trailing * on the path matches any suffix. Requests beyond the cap wait in a
+# bounded queue for up to CONCURRENCY_QUEUE_TIMEOUT_SECONDS, otherwise they get a 503.
+CONCURRENCY_LIMITS = os.getenv(
+    "CONCURRENCY_LIMITS",
+    "POST /api/v1/login/=16:64,"
+    "POST /api/v1/user/=8:32,"
+    "POST /api/v1/admin/=8:32,"
+    "PUT /api/v1/password_reset/*=8:32"
+)
+CONCURRENCY_QUEUE_TIMEOUT_SECONDS = float(os.getenv("CONCURRENCY_QUEUE_TIMEOUT_SECONDS", "5"))
+CONCURRENCY_RETRY_AFTER_SECONDS = int(os.getenv("CONCURRENCY_RETRY_AFTER_SECONDS", "1"))
+
+# Idempotency-Key support for create endpoints. Stored responses are replayed for retries
+# within the TTL; recent ones are also kept in process memory to skip the database lookup.
+IDEMPOTENT_ROUTES = os.getenv("IDEMPOTENT_ROUTES", "POST /api/v1/user/,POST /api/v1/admin/,POST /api/v1/member/")
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_CACHE_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_CACHE_MAX_ENTRIES", "10000"))
+# An unfinished claim older than this is taken over by the next retry; keep it above the
+# deadline of the idempotent routes so a slow first attempt is not run twice
+IDEMPOTENCY_CLAIM_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_CLAIM_LEASE_SECONDS", "30"))
+# Deadline for storing and releasing keys; separate from the request deadline so a request
+# that timed out can still release its key
+IDEMPOTENCY_STORE_TIMEOUT_MS = int(os.getenv("IDEMPOTENCY_STORE_TIMEOUT_MS", "2000"))
+
+# How new user and member ids are assigned: "counter" takes the next value from the
+# counters collection, "snowflake" builds a time-ordered 64-bit id locally with no round trip.
+# When ID_WORKER_ID (0-1023) is unset, each process leases a unique worker id from the
+# worker_ids collection and renews it in the background; an id whose lease runs out is reused.
+# A fixed ID_WORKER_ID only suits single-process deployments.
+ID_STRATEGY = os.getenv("ID_STRATEGY", "counter")
+ID_WORKER_ID = os.getenv("ID_WORKER_ID")
+ID_WORKER_LEASE_SECONDS = float(os.getenv("ID_WORKER_LEASE_SECONDS", "60"))
+
+# Connections opened to MongoDB during startup so the first requests don't pay for them
+MONGO_WARMUP_CONNECTIONS = int(os.getenv("MONGO_WARMUP_CONNECTIONS", "4"))
+
+# Serve /docs, /redoc and /openapi.json. The schema is only built on the first request for
+# it; turning docs off in production means no worker ever spends time generating it.
+ENABLE_DOCS = os.getenv("ENABLE_DOCS", "true").lower() in ("1", "true", "yes")
+
+# Defaults for `manage.py serve`; WEB_CONCURRENCY=0 starts one worker per CPU core
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8083"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))
+SERVER_KEEP_ALIVE_SECONDS = int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "5"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "30"))
+
+# MongoDB connection. The historical default database is "local", which is never
+# replicated; set MONGO_DB to a real database name when running against a replica set.
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB = os.getenv("MONGO_DB", "local")
+MONGO_APP_NAME = os.getenv("MONGO_APP_NAME", "user-management")
+# Size the pool to the requests one worker can have in flight at once
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"))
+# Comma separated, in order of preference, e.g. "zstd,snappy,zlib"
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+# Read preference for GET endpoints, e.g. "secondaryPreferred"; writes always go to the primary
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+MONGO_WRITE_CONCERN = os.getenv("MONGO_WRITE_CONCERN", "1")
+MONGO_JOURNAL = os.getenv("MONGO_JOURNAL", "").lower() in ("1", "true", "yes")
+
+# Dashboard counters are updated on every write and fully recomputed on this interval
+# to correct any drift; 0 turns the periodic reconciliation off.
+STATS_RECONCILE_INTERVAL_SECONDS = float(os.getenv("STATS_RECONCILE_INTERVAL_SECONDS", "3600"))
+
+# Search totals are counted up to this many matches; 0 counts them all
+SEARCH_COUNT_LIMIT = int(os.getenv("SEARCH_COUNT_LIMIT", "10000"))
+
+# Upper bound on the documents one bulk update or delete may touch
+BULK_MAX_DOCUMENTS = int(os.getenv("BULK_MAX_DOCUMENTS", "5000"))
+
+# Last-login timestamps and login counts are buffered in memory and written in batches
+ACTIVITY_FLUSH_INTERVAL_SECONDS = float(os.getenv("ACTIVITY_FLUSH_INTERVAL_SECONDS", "10"))
+ACTIVITY_BUFFER_MAX_ENTRIES = int(os.getenv("ACTIVITY_BUFFER_MAX_ENTRIES", "50000"))
+
+# Audit events are queued in memory and inserted in batches. A capped collection
+# (AUDIT_CAPPED_SIZE_BYTES > 0) or a retention period (AUDIT_RETENTION_DAYS > 0, via a
+# TTL index) bounds its size; capped takes precedence since TTL indexes cannot apply to it.
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_QUEUE_MAX_EVENTS = int(os.getenv("AUDIT_QUEUE_MAX_EVENTS", "10000"))
+AUDIT_CAPPED_SIZE_BYTES = int(os.getenv("AUDIT_CAPPED_SIZE_BYTES", "0"))
+AUDIT_RETENTION_DAYS = float(os.getenv("AUDIT_RETENTION_DAYS", "0"))
+
+# Deleted users and members stay restorable for this long, then a background job moves
+# them to <collection>_archive in batches; an interval of 0 turns the purge off.
+SOFT_DELETE_RETENTION_DAYS = float(os.getenv("SOFT_DELETE_RETENTION_DAYS", "30"))
+SOFT_DELETE_PURGE_INTERVAL_SECONDS = float(os.getenv("SOFT_DELETE_PURGE_INTERVAL_SECONDS", "3600"))
+SOFT_DELETE_PURGE_BATCH_SIZE = int(os.getenv("SOFT_DELETE_PURGE_BATCH_SIZE", "500"))
+
+# Background jobs are stored in MongoDB and run by worker threads in every server process;
+# JOB_WORKERS=0 leaves this process enqueue-only.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "5"))
+# A running job whose lease lapses (its worker died) is picked up again
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "30"))
+JOB_RESULT_TTL_DAYS = float(os.getenv("JOB_RESULT_TTL_DAYS", "7"))
+
+# Bloom filter built with `manage.py build-breached-filter`; passwords found in it are rejected.
+# Empty turns the check off.
+BREACHED_PASSWORD_FILTER = os.getenv("BREACHED_PASSWORD_FILTER", "")
+
+# /readyz reports the worker unready (503) when any of these is exceeded
+READY_PING_TIMEOUT_MS = int(os.getenv("READY_PING_TIMEOUT_MS", "500"))
+READY_MAX_LOOP_LAG_MS = float(os.getenv("READY_MAX_LOOP_LAG_MS", "250"))
+READY_MAX_HASH_QUEUE = int(os.getenv("READY_MAX_HASH_QUEUE", "32"))
+
+# Every request gets a deadline; MongoDB queries run with the time left as maxTimeMS and a
+# request still waiting when it passes gets a 504. Per-route overrides are "METHOD PATH=ms"
+# entries like CONCURRENCY_LIMITS; 0 means no deadline.
+REQUEST_DEADLINE_MS = int(os.getenv("REQUEST_DEADLINE_MS", "10000"))
+REQUEST_DEADLINES = os.getenv(
+    "REQUEST_DEADLINES",
+    "PATCH /api/v1/user/bulk=60000,"
+    "DELETE /api/v1/user/bulk=60000,"
+    "PATCH /api/v1/member/bulk=60000,"
+    "DELETE /api/v1/member/bulk=60000"
+)
@@ -1,4 +1,14 @@
 from fastapi import HTTPException, status
+from pymongo.errors import PyMongoError
 class InvalidUserException(HTTPException):
     def __init__(self, detail: str):
-        super().__init__(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
\ No newline at end of file
+        super().__init__(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
+
+class RequestTimeoutException(HTTPException):
+    # The request ran out of its deadline, usually because MongoDB hit maxTimeMS
+    def __init__(self, detail: str = "Request did not complete within its deadline"):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=detail)
+
+def is_timeout(exc: Exception) -> bool:
+    # pymongo flags every timeout it raises (maxTimeMS, network, server selection, pool wait)
+    return isinstance(exc, PyMongoError) and exc.timeout
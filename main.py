@@ -1,18 +1,124 @@
 from fastapi import FastAPI,Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from middleware.concurrency import ConcurrencyLimitMiddleware
+from middleware.idempotency import IdempotencyMiddleware
+from middleware.deadline import DeadlineMiddleware
 from routes.user import user
-from exceptions.exceptions import InvalidUserException
+from exceptions.exceptions import InvalidUserException, RequestTimeoutException, is_timeout
 from routes.login_router import login_router
 from routes.admin_router import admin
 from routes.members_router import members
 from routes.password_reset import password_reset_router
-from config.db import conn
-import bcrypt
+from routes.metrics_router import metrics_router
+from routes.directory_router import directory_router
+from routes.stats_router import stats_router
+from routes.audit_router import audit_router
+from routes.jobs_router import jobs_router
+from routes.health_router import health_router
+from config.db import db, warm_up_pool
+from config.indexes import ensure_indexes
+from config import settings
+from utils.ids import next_id
+from utils.hashing import hash_password, get_rounds
+from utils.startup import startup_phase, startup_timings
+from utils.background import start_background_tasks, stop_background_tasks
+from utils.health import loop_lag
+from utils import stats
+from utils.list_cache import list_cache
+from utils.breached_passwords import load_filter
+from utils.emails import email_query, normalize_email
+from models.user import User, UpdateUser
+from models.admin import Admin
+from models.members import Members, UpdateMember
+from models.login import LoginRequest
+from models.password_reset import PasswordResetRequest
+from pymongo.errors import PyMongoError
 from contextlib import asynccontextmanager
+import logging
+import time
 
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="User Management")
+
+# Password hashing setup
+def get_password_hash(password: str) -> str:
+    return hash_password(password)
+
+
+def seed_admin():
+    admin_name = "Admin"
+    admin_email = "admin@gmail.com"
+    admin_mobile_number = 8907654321
+    admin_password = "Admin@12345"
+    admin_location = "Bangalore"
+    admin_role = "admin"
+    admin_whatsapp_api_token=None
+    admin_whatsapp_cloud_number_id=None
+
+    existing_admin = db.user.find_one(email_query(admin_email), {"_id": 1})
+
+    if not existing_admin:
+        # Only take an id (and pay for a hash) when the admin really has to be created
+        admin = {
+            "id": next_id('userid'),
+            "name": admin_name,
+            "email": admin_email,
+            "email_normalized": normalize_email(admin_email),
+            "mobile_number": admin_mobile_number,
+            "location": admin_location,
+            "password": get_password_hash(admin_password),
+            "role": admin_role,
+            "whatsapp_api_token": admin_whatsapp_api_token,
+            "whatsapp_cloud_number_id": admin_whatsapp_cloud_number_id
+        }
+        # Upsert on the normalized email so workers starting together still create a single admin
+        result = db.user.update_one(email_query(admin_email), {"$setOnInsert": admin}, upsert=True)
+        if result.upserted_id is not None:
+            stats.record_insert("user", admin)
+            list_cache.bump("user")
+
+
+def warm_up_validators():
+    # The first validation of each model pays for lazy setup inside pydantic and email-validator
+    samples = {
+        "name": "Warmup",
+        "email": "warmup@example.com",
+        "mobile_number": 9876543210,
+        "location": "Warmup",
+        "password": "Warmup@12345",
+        "new_password": "Warmup@12345",
+    }
+    for model in (User, UpdateUser, Admin, Members, UpdateMember, LoginRequest, PasswordResetRequest):
+        model.model_validate({field: samples[field] for field in model.model_fields if field in samples})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    with startup_phase("hashing"):
+        get_rounds()  # resolve (and calibrate if configured) the bcrypt cost before serving
+    with startup_phase("mongo_pool"):
+        warm_up_pool(settings.MONGO_WARMUP_CONNECTIONS)
+    with startup_phase("indexes"):
+        ensure_indexes()
+    with startup_phase("breached_passwords"):
+        load_filter()  # mapped before the validators first need it
+    with startup_phase("validators"):
+        warm_up_validators()
+    with startup_phase("admin_seed"):
+        seed_admin()
+    startup_timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+    logger.info("startup finished in %.2f ms", startup_timings["total"])
+    start_background_tasks()
+    loop_lag.start()
+    yield
+    await loop_lag.stop()
+    stop_background_tasks()
+
+
+docs_options = {} if settings.ENABLE_DOCS else {"openapi_url": None, "docs_url": None, "redoc_url": None}
+app = FastAPI(title="User Management", lifespan=lifespan, **docs_options)
 
 origins = [
     "*",
@@ -20,6 +126,14 @@ origins = [
     "http://localhost:8000"
 ]
 
+# Added before CORS so that shed (503) responses still carry CORS headers.
+# Idempotent replays sit outside the concurrency caps so they never wait in a queue.
+# The deadline wraps both, so time spent queued counts against it and a client that
+# disconnects while queued gives up its place.
+app.add_middleware(ConcurrencyLimitMiddleware)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(DeadlineMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -37,55 +151,32 @@ async def invalid_user_handler(request: Request, exc: InvalidUserException):
         content={"message": exc.detail},
     )
 
+@app.exception_handler(RequestTimeoutException)
+async def request_timeout_handler(request: Request, exc: RequestTimeoutException):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"message": exc.detail},
+    )
+
+@app.exception_handler(PyMongoError)
+async def mongo_error_handler(request: Request, exc: PyMongoError):
+    # Queries that ran past the request deadline become a 504; anything else is still a 500
+    if is_timeout(exc):
+        return await request_timeout_handler(request, RequestTimeoutException())
+    raise exc
+
+app.include_router(health_router)
 app.include_router(user)
 app.include_router(admin)
 app.include_router(members)
 app.include_router(login_router)
 app.include_router(password_reset_router)
-
-def get_next_sequence_value(sequence_name):
-    seq = conn.local.counters.find_one_and_update(
-        {"_id": sequence_name},
-        {"$inc": {"sequence_value": 1}},
-        upsert=True,
-        return_document=True
-    )
-    return seq["sequence_value"]
-
-
-# Password hashing setup
-def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-@asynccontextmanager
-def lifespan():
-    admin_id=get_next_sequence_value('userid')
-    admin_name = "Admin"
-    admin_email = "admin@gmail.com"
-    admin_mobile_number = 8907654321
-    admin_password = "Admin@12345"
-    admin_location = "Bangalore"
-    admin_role = "admin"
-    admin_whatsapp_api_token=None
-    admin_whatsapp_cloud_number_id=None
-
-    existing_admin = conn.local.user.find_one({"email": admin_email})
-
-    if not existing_admin:
-        hashed_password = get_password_hash(admin_password)
-        admin = {
-            "id":admin_id,
-            "name": admin_name,
-            "email": admin_email,
-            "mobile_number": admin_mobile_number,
-            "location": admin_location,
-            "password": hashed_password,
-            "role": admin_role,
-            "whatsapp_api_token": admin_whatsapp_api_token,
-            "whatsapp_cloud_number_id": admin_whatsapp_cloud_number_id
-        }
-        conn.local.user.insert_one(admin)
+app.include_router(directory_router)
+app.include_router(stats_router)
+app.include_router(audit_router)
+app.include_router(jobs_router)
+app.include_router(metrics_router)
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8083)
+    from manage import run_server
+    run_server()
@@ -0,0 +1,219 @@
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from config import settings
+
+# Runs inside a fresh interpreter so nothing is already imported or cached
+PROFILE_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+timings = {"import_main": round((time.perf_counter() - start) * 1000, 2)}
+if RUN_LIFESPAN:
+    async def run_lifespan():
+        async with main.lifespan(main.app):
+            pass
+    asyncio.run(run_lifespan())
+    from utils.startup import startup_timings
+    timings.update({"lifespan." + name: ms for name, ms in startup_timings.items()})
+print(json.dumps(timings))
+"""
+
+
+def parse_importtime(output: str) -> list:
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def startup_profile(args):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROFILE_SCRIPT.replace("RUN_LIFESPAN", str(args.lifespan))],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return result.returncode
+
+    modules = parse_importtime(result.stderr)
+    by_package = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+
+    print("Startup phases (ms)")
+    for phase, ms in json.loads(result.stdout.strip().splitlines()[-1]).items():
+        print(f"  {phase:<30} {ms:>10.2f}")
+
+    print(f"\nImport time by top-level package (ms, top {args.top})")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<30} {self_us / 1000:>10.2f}")
+
+    print(f"\nSlowest modules by cumulative import time (ms, top {args.top})")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda module: -module[2])[:args.top]:
+        print(f"  {name:<50} {cumulative_us / 1000:>10.2f} (self {self_us / 1000:.2f})")
+    return 0
+
+
+def build_breached_filter(args):
+    from utils.breached_passwords import build_filter
+    summary = build_filter(args.source, args.output, args.false_positive_rate)
+    print(f"{summary['passwords']} passwords -> {args.output} "
+          f"({summary['bytes'] / 1024 / 1024:.1f} MiB, {summary['hashes']} hashes)")
+    print(f"Set BREACHED_PASSWORD_FILTER={args.output} to enable the check")
+    return 0
+
+
+def migrate_emails(args):
+    from utils.emails import migrate_emails as run_migration
+    for collection, counts in run_migration(args.batch_size).items():
+        print(f"{collection}: {counts['backfilled']} backfilled, {counts['duplicates']} duplicates soft deleted")
+    return 0
+
+
+def _legacy_user_entity(item) -> dict:
+    # The hand-built dict the routes returned before the response models, kept for comparison
+    from schemas.user import timestamp
+    return {
+        "id": item["id"],
+        "name": item["name"],
+        "email": item["email"],
+        "mobile_number": item["mobile_number"],
+        "location": item["location"],
+        "role": item["role"],
+        "password": item["password"],
+        "whatsapp_api_token": item["whatsapp_api_token"],
+        "whatsapp_cloud_number_id": item["whatsapp_cloud_number_id"],
+        "last_login": timestamp(item.get("last_login")),
+        "login_count": item.get("login_count", 0),
+    }
+
+
+def benchmark_serialization(args):
+    import timeit
+    from bson import ObjectId
+    from fastapi.responses import JSONResponse
+    from schemas.user import userJson, usersJson
+
+    # Synthetic documents shaped like stored users, so no database is needed
+    users = [{
+        "_id": ObjectId(),
+        "id": 1_000_000 + number,
+        "name": f"User {number}",
+        "email": f"user{number}@example.com",
+        "email_normalized": f"user{number}@example.com",
+        "mobile_number": 9000000000 + number,
+        "location": "Bangalore",
+        "role": "user",
+        "password": "$2b$12$" + "x" * 53,
+        "whatsapp_api_token": None,
+        "whatsapp_cloud_number_id": None,
+    } for number in range(args.count)]
+
+    single = users[0]
+    candidates = [
+        ("one user", "dict + JSONResponse", lambda: JSONResponse(content=_legacy_user_entity(single)).body, args.count),
+        ("one user", "TypeAdapter.dump_json", lambda: userJson(single), args.count),
+        (f"{args.count} users", "dict + JSONResponse",
+         lambda: JSONResponse(content=[_legacy_user_entity(user) for user in users]).body, 1),
+        (f"{args.count} users", "TypeAdapter.dump_json", lambda: usersJson(users), 1),
+    ]
+    print(f"Best of {args.repeat} runs")
+    for payload, name, candidate, number in candidates:
+        best = min(timeit.repeat(candidate, number=number, repeat=args.repeat)) / number
+        print(f"  {payload:<12} {name:<25} {best * 1e6:>10.1f} us  {len(candidate()):>9} bytes")
+    return 0
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def run_server(host: str = None, port: int = None, workers: int = None, reload: bool = False,
+               keep_alive: int = None, backlog: int = None, forwarded_allow_ips: str = None):
+    import uvicorn
+    workers = workers or settings.WEB_CONCURRENCY or os.cpu_count() or 1
+    if settings.ID_WORKER_ID is not None and workers > 1 and not reload:
+        # Every worker would inherit the same id and generate colliding snowflake ids
+        print("ID_WORKER_ID is ignored with several workers; each worker leases its own id", file=sys.stderr)
+        os.environ.pop("ID_WORKER_ID", None)
+    uvicorn.run(
+        "main:app",  # import string so each worker process imports the app (and its MongoClient) itself
+        host=host or settings.SERVER_HOST,
+        port=port or settings.SERVER_PORT,
+        workers=1 if reload else workers,
+        reload=reload,
+        loop="uvloop" if _available("uvloop") else "asyncio",
+        http="httptools" if _available("httptools") else "h11",
+        timeout_keep_alive=keep_alive or settings.SERVER_KEEP_ALIVE_SECONDS,
+        backlog=backlog or settings.SERVER_BACKLOG,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        proxy_headers=True,
+        forwarded_allow_ips=forwarded_allow_ips,
+        access_log=False,
+    )
+
+
+def serve(args):
+    run_server(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=args.reload,
+        keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+    )
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="User Management service commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    profile = commands.add_parser("startup-profile", help="Show where worker startup time goes")
+    profile.add_argument("--top", type=int, default=20, help="Number of packages and modules to list")
+    profile.add_argument("--lifespan", action="store_true", help="Also run the startup lifespan (needs MongoDB)")
+    profile.set_defaults(handler=startup_profile)
+
+    server = commands.add_parser("serve", help="Run the API with one worker per CPU core")
+    server.add_argument("--host", help=f"Bind address (default {settings.SERVER_HOST})")
+    server.add_argument("--port", type=int, help=f"Bind port (default {settings.SERVER_PORT})")
+    server.add_argument("--workers", type=int, help="Worker processes (default WEB_CONCURRENCY or the CPU count)")
+    server.add_argument("--reload", action="store_true", help="Restart on code changes (development, single worker)")
+    server.add_argument("--keep-alive", type=int, help="Seconds to keep idle HTTP connections open")
+    server.add_argument("--backlog", type=int, help="Pending connections the socket queues")
+    server.add_argument("--forwarded-allow-ips", help="Proxies trusted to set X-Forwarded-For (client IPs for rate limits)")
+    server.set_defaults(handler=serve)
+
+    breached = commands.add_parser("build-breached-filter", help="Build the breached password filter from a text list")
+    breached.add_argument("source", help="Plain text file, one password per line")
+    breached.add_argument("--output", default="breached_passwords.bloom", help="Filter file to write")
+    breached.add_argument("--false-positive-rate", type=float, default=0.001,
+                          help="Chance that a password not on the list is rejected anyway")
+    breached.set_defaults(handler=build_breached_filter)
+
+    emails = commands.add_parser("migrate-emails", help="Backfill normalized emails and set aside case-insensitive duplicates")
+    emails.add_argument("--batch-size", type=int, default=1000, help="Documents updated per bulk write")
+    emails.set_defaults(handler=migrate_emails)
+
+    benchmark = commands.add_parser("benchmark-serialization", help="Compare user list serialization paths")
+    benchmark.add_argument("--count", type=int, default=1000, help="Users per list")
+    benchmark.add_argument("--repeat", type=int, default=20, help="Runs per path; the best is reported")
+    benchmark.set_defaults(handler=benchmark_serialization)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import time
+from collections import deque
+from config import settings
+
+
+class RouteLimit:
+    # Caps in-flight requests for one route; extra requests wait in a bounded FIFO queue
+    def __init__(self, pattern: str, max_concurrent: int, max_queued: int):
+        self.method, self.path = pattern.split(" ", 1)
+        self.prefix = self.path.endswith("*")
+        self.path = self.path.rstrip("*")
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.active = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.shed = 0
+        self.queued_total = 0
+        self.queue_ms_total = 0.0
+        self.queue_ms_max = 0.0
+
+    def matches(self, method: str, path: str) -> bool:
+        if method != self.method:
+            return False
+        return path.startswith(self.path) if self.prefix else path == self.path
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queued:
+            self.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # The slot was handed over just as we gave up, pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.shed += 1
+            return False
+
+        waited_ms = (time.perf_counter() - started) * 1000
+        self.admitted += 1
+        self.queued_total += 1
+        self.queue_ms_total += waited_ms
+        self.queue_ms_max = max(self.queue_ms_max, waited_ms)
+        return True
+
+    def release(self):
+        # Hand the slot straight to the next waiter so queued requests keep FIFO order
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "avg_queue_ms": self.queue_ms_total / self.queued_total if self.queued_total else 0.0,
+            "max_queue_ms": self.queue_ms_max,
+        }
+
+
+def parse_limits(spec: str) -> list:
+    limits = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        pattern, sizes = entry.rsplit("=", 1)
+        max_concurrent, max_queued = sizes.split(":")
+        limits.append(RouteLimit(pattern.strip(), int(max_concurrent), int(max_queued)))
+    return limits
+
+
+class ConcurrencyLimitMiddleware:
+    # ASGI middleware returning 503 with Retry-After once a route's queue is full or the wait times out
+    def __init__(self, app, limits: list = None, queue_timeout: float = None, retry_after: int = None):
+        self.app = app
+        self.limits = route_limits if limits is None else limits
+        self.queue_timeout = settings.CONCURRENCY_QUEUE_TIMEOUT_SECONDS if queue_timeout is None else queue_timeout
+        self.retry_after = settings.CONCURRENCY_RETRY_AFTER_SECONDS if retry_after is None else retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limit = next((limit for limit in self.limits if limit.matches(scope["method"], scope["path"])), None)
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        if not await limit.acquire(self.queue_timeout):
+            return await self._service_unavailable(send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
+
+    async def _service_unavailable(self, send):
+        body = json.dumps({"detail": "Server is busy, try again later"}).encode('utf-8')
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode('latin-1')),
+                (b"retry-after", str(self.retry_after).encode('latin-1')),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+route_limits = parse_limits(settings.CONCURRENCY_LIMITS)
+
+
+def concurrency_stats() -> dict:
+    return {f"{limit.method} {limit.path}{'*' if limit.prefix else ''}": limit.stats() for limit in route_limits}
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import pymongo
+from config import settings
+
+
+class RouteDeadline:
+    # Deadline for one route in milliseconds; a trailing * on the path matches any suffix
+    def __init__(self, pattern: str, milliseconds: int):
+        self.method, self.path = pattern.split(" ", 1)
+        self.prefix = self.path.endswith("*")
+        self.path = self.path.rstrip("*")
+        self.milliseconds = milliseconds
+
+    def matches(self, method: str, path: str) -> bool:
+        if method != self.method:
+            return False
+        return path.startswith(self.path) if self.prefix else path == self.path
+
+
+def parse_deadlines(spec: str) -> list:
+    deadlines = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        pattern, milliseconds = entry.rsplit("=", 1)
+        deadlines.append(RouteDeadline(pattern.strip(), int(milliseconds)))
+    return deadlines
+
+
+class DeadlineMiddleware:
+    # ASGI middleware giving every request a deadline and cancelling it when the client goes away.
+    # pymongo.timeout() sends the remaining time as maxTimeMS with each query of the request,
+    # so MongoDB stops work nobody will read. Time spent waiting at an await point (a concurrency
+    # queue, a bcrypt thread) is bounded by an asyncio timeout; both end in a 504.
+    def __init__(self, app, deadlines: list = None, default_ms: int = None):
+        self.app = app
+        self.deadlines = route_deadlines if deadlines is None else deadlines
+        self.default_ms = settings.REQUEST_DEADLINE_MS if default_ms is None else default_ms
+
+    def deadline_ms(self, method: str, path: str) -> int:
+        deadline = next((deadline for deadline in self.deadlines if deadline.matches(method, path)), None)
+        return self.default_ms if deadline is None else deadline.milliseconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        milliseconds = self.deadline_ms(scope["method"], scope["path"])
+        seconds = milliseconds / 1000 if milliseconds > 0 else None
+
+        inbox = asyncio.Queue()
+        response = {"started": False, "complete": False, "status": None}
+
+        async def tracked_send(message):
+            if message["type"] == "http.response.start":
+                response["started"] = True
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response["complete"] = True
+            await send(message)
+
+        handler = asyncio.ensure_future(self._run(scope, inbox.get, tracked_send, seconds, response))
+
+        async def listen_for_disconnect():
+            # The only reader of receive(); the app gets each message through the inbox
+            while True:
+                message = await receive()
+                await inbox.put(message)
+                if message["type"] == "http.disconnect":
+                    # Servers also report a disconnect once the response is finished; only an
+                    # early one means the client gave up
+                    if not response["complete"]:
+                        deadline_counters["cancelled"] += 1
+                        handler.cancel()
+                    return
+
+        listener = asyncio.ensure_future(listen_for_disconnect())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not handler.cancelled():
+                # This task itself is being cancelled (server shutdown), pass it on
+                handler.cancel()
+                raise
+        finally:
+            listener.cancel()
+        if response["status"] == 504:
+            deadline_counters["timed_out"] += 1
+
+    async def _run(self, scope, receive, send, seconds, response):
+        if seconds is None:
+            return await self.app(scope, receive, send)
+        try:
+            with pymongo.timeout(seconds):
+                async with asyncio.timeout(seconds):
+                    await self.app(scope, receive, send)
+        except TimeoutError:
+            if response["started"]:
+                raise
+            await _gateway_timeout(send)
+
+
+async def _gateway_timeout(send):
+    body = json.dumps({"message": "Request did not complete within its deadline"}).encode('utf-8')
+    await send({
+        "type": "http.response.start",
+        "status": 504,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode('latin-1')),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+route_deadlines = parse_deadlines(settings.REQUEST_DEADLINES)
+deadline_counters = {"timed_out": 0, "cancelled": 0}
+
+
+def deadline_stats() -> dict:
+    return {
+        "default_ms": settings.REQUEST_DEADLINE_MS,
+        "routes": {
+            f"{deadline.method} {deadline.path}{'*' if deadline.prefix else ''}": deadline.milliseconds
+            for deadline in route_deadlines
+        },
+        **deadline_counters,
+    }
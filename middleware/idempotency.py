@@ -0,0 +1,98 @@
+import hashlib
+import json
+import logging
+from pymongo.errors import PyMongoError
+from config import settings
+from utils.idempotency import idempotency_store
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyMiddleware:
+    # Replays the stored response for a repeated Idempotency-Key before the request reaches
+    # the route, so retries skip validation, hashing and the insert entirely.
+    def __init__(self, app, routes: str = None, store=None):
+        self.app = app
+        routes = settings.IDEMPOTENT_ROUTES if routes is None else routes
+        self.routes = {tuple(route.strip().split(" ", 1)) for route in routes.split(",") if route.strip()}
+        self.store = idempotency_store if store is None else store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            return await self.app(scope, receive, send)
+        idempotency_key = dict(scope["headers"]).get(b"idempotency-key")
+        if idempotency_key is None:
+            return await self.app(scope, receive, send)
+        idempotency_key = idempotency_key.decode('latin-1')
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            return await _send_json(send, 400, {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"})
+
+        body = await _read_body(receive)
+        key = f"{scope['method']} {scope['path']} {idempotency_key}"
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        record = self.store.cached(key) or self.store.begin(key, fingerprint)
+        if record is not None:
+            if record["fingerprint"] != fingerprint:
+                return await _send_json(send, 422, {"detail": "Idempotency-Key was already used with a different request body"})
+            if not record["completed"]:
+                return await _send_json(send, 409, {"detail": "A request with this Idempotency-Key is still in progress"})
+            return await _send_bytes(send, record["status"], record["content_type"], record["body"], replayed=True)
+
+        response = {"status": 500, "content_type": "application/json", "body": []}
+
+        async def replay_receive():
+            nonlocal body
+            if body is not None:
+                message, body = {"type": "http.request", "body": body, "more_body": False}, None
+                return message
+            return await receive()
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = dict(message.get("headers", [])).get(b"content-type", b"").decode('latin-1')
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            # Includes cancellation when the client disconnects, so a retry is not told "in progress".
+            # A failure here must not replace the original error (or the cancellation of a timeout).
+            try:
+                self.store.abandon(key)
+            except PyMongoError:
+                logger.exception("releasing idempotency key %r failed", key)
+            raise
+        if response["status"] >= 500:
+            self.store.abandon(key)
+        else:
+            self.store.complete(key, fingerprint, response["status"], response["content_type"], b"".join(response["body"]))
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _send_json(send, status: int, content: dict):
+    await _send_bytes(send, status, "application/json", json.dumps(content).encode('utf-8'))
+
+
+async def _send_bytes(send, status: int, content_type: str, body: bytes, replayed: bool = False):
+    headers = [
+        (b"content-type", content_type.encode('latin-1')),
+        (b"content-length", str(len(body)).encode('latin-1')),
+    ]
+    if replayed:
+        headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
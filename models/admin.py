@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, field_validator
 from exceptions.exceptions import InvalidUserException
-from typing import Optional
+from typing import List, Optional
 import re
 
 class Admin(BaseModel):
@@ -32,4 +32,6 @@ class Admin(BaseModel):
             raise InvalidUserException(detail='Mobile number must be exactly 10 digits')
         return v
 
-    
\ No newline at end of file
+
+class BulkAdmin(BaseModel):
+    users: List[Admin]
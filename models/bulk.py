@@ -0,0 +1,37 @@
+from pydantic import BaseModel, model_validator
+from exceptions.exceptions import InvalidUserException
+from models.user import UpdateUser
+from models.members import UpdateMember
+from typing import List, Optional
+
+
+class BulkFilter(BaseModel):
+    # Same criteria as the search endpoints: name and email are prefixes, the lists match any value
+    name: Optional[str] = None
+    email: Optional[str] = None
+    location: Optional[List[str]] = None
+    mobile_number: Optional[List[int]] = None
+
+
+class BulkSelection(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[BulkFilter] = None
+
+    @model_validator(mode='after')
+    def validate_selection(self):
+        if (self.ids is None) == (self.filter is None):
+            raise InvalidUserException(detail='Provide either ids or filter')
+        if self.ids is not None and not self.ids:
+            raise InvalidUserException(detail='ids must not be empty')
+        # An empty filter would select every document
+        if self.filter is not None and not self.filter.model_dump(exclude_none=True):
+            raise InvalidUserException(detail='filter must have at least one criterion')
+        return self
+
+
+class BulkUpdateUsers(BulkSelection):
+    update: UpdateUser
+
+
+class BulkUpdateMembers(BulkSelection):
+    update: UpdateMember
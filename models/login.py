@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, field_validator
 from exceptions.exceptions import InvalidUserException
+from utils.breached_passwords import is_breached
 import re
 
 class LoginRequest(BaseModel):
@@ -27,4 +28,7 @@ class LoginRequest(BaseModel):
             raise InvalidUserException(detail='Password must contain at least one lowercase letter')
         if not any(char in "!@#$%^&*()_+-=" for char in v):
             raise InvalidUserException(detail='Password must contain at least one special character')
+        if is_breached(v):
+            # Still correct, but no longer safe: the account has to go through a password reset
+            raise InvalidUserException(detail='This password appears in a list of breached passwords, reset your password to sign in')
         return v
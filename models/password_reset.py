@@ -1,5 +1,7 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, EmailStr, field_validator
+from typing import List
 from exceptions.exceptions import InvalidUserException
+from utils.breached_passwords import is_breached
 
 class PasswordResetRequest(BaseModel):
     new_password: str
@@ -16,4 +18,10 @@ class PasswordResetRequest(BaseModel):
             raise InvalidUserException(detail='Password must contain at least one lowercase letter')
         if not any(char in "!@#$%^&*()_+-=" for char in v):
             raise InvalidUserException(detail='Password must contain at least one special character')
+        if is_breached(v):
+            raise InvalidUserException(detail='This password appears in a list of breached passwords')
         return v
+
+
+class BulkPasswordReset(BaseModel):
+    emails: List[EmailStr]
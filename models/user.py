@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, field_validator
 from exceptions.exceptions import InvalidUserException
+from utils.breached_passwords import is_breached
 from typing import Optional
 import re
 
@@ -48,6 +49,8 @@ class User(BaseModel):
             raise InvalidUserException(detail='Password must contain at least one lowercase letter')
         if not any(char in "!@#$%^&*()_+-=" for char in v):
             raise InvalidUserException(detail='Password must contain at least one special character')
+        if is_breached(v):
+            raise InvalidUserException(detail='This password appears in a list of breached passwords')
         return v
 
 
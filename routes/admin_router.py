@@ -1,68 +1,104 @@
-from fastapi import APIRouter, HTTPException, status, Request
-from fastapi.responses import JSONResponse
-from models.admin import Admin
-from config.db import conn
-from schemas.user import userEntity, usersEntity
-from bcrypt import hashpw, gensalt
-from exceptions.exceptions import InvalidUserException
-import random
-import string
+from fastapi import APIRouter, HTTPException, status
+from pymongo.errors import DuplicateKeyError
+from models.admin import Admin, BulkAdmin
+from config.db import db
+from utils.ids import next_id
+from schemas.user import UserOut, userJson
+from schemas.responses import RawJSONResponse
+from utils.hashing import hash_password_async, hash_password
+from exceptions.exceptions import InvalidUserException, RequestTimeoutException, is_timeout
+from utils import stats
+from utils.list_cache import list_cache
+from utils.audit import audit_log
+from utils.jobs import job_handler, job_queue
+from config import settings
+from routes.jobs_router import job_accepted
+from utils.emails import email_query, normalize_email
 
 admin = APIRouter(prefix="/api/v1/admin", tags=['Admin'])
 
-def get_next_sequence_value(sequence_name):
-    seq = conn.local.counters.find_one_and_update(
-        {"_id": sequence_name},
-        {"$inc": {"sequence_value": 1}},
-        upsert=True,
-        return_document=True
-    )
-    return seq["sequence_value"]
 
-
-def generate_password(length: int = 12) -> str:
-    if length < 8:
-        raise ValueError("Password length should be at least 8 characters.")
-    
-    # Ensure the password has at least one of each character type
-    characters = {
-        "uppercase": random.choice(string.ascii_uppercase),
-        "lowercase": random.choice(string.ascii_lowercase),
-        "digits": random.choice(string.digits),
-        "special": random.choice(string.punctuation)
-    }
-    
-    # Fill the rest of the password length with random choices from all character types
-    all_characters = string.ascii_letters + string.digits + string.punctuation
-    remaining_length = length - len(characters)
-    password = ''.join(random.choices(all_characters, k=remaining_length))
-    
-    # Combine and shuffle to ensure randomness
-    password_list = list(characters.values()) + list(password)
-    random.shuffle(password_list)
-    
-    return ''.join(password_list)
-
-@admin.post('/')
+@admin.post('/', status_code=status.HTTP_201_CREATED, response_model=UserOut)
 async def create_admin_user(user: Admin):
     try:
-        existing_user = conn.local.user.find_one({"email": user.email})
+        existing_user = db.user.find_one(email_query(user.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="User with this email already exists"
             )
+        # Only admin provisioning needs the generator, so it is loaded on first use
+        from utils.passwords import generate_password
         generated_password = generate_password(8)  # Ensure at least 8 characters
         user_dict = user.model_dump()
-        user_dict['id'] = get_next_sequence_value('userid')   # Assign sequential ID
-        user_dict['password'] = hashpw(generated_password.encode('utf-8'), gensalt()).decode('utf-8')
+        user_dict['email_normalized'] = normalize_email(user.email)
+        user_dict['id'] = next_id('userid')   # Assign time-ordered or sequential ID
+        user_dict['password'] = await hash_password_async(generated_password)
         user_dict["role"]="user"
         user_dict["whatsapp_api_token"]=None
         user_dict["whatsapp_cloud_number_id"]=None
-        conn.local.user.insert_one(user_dict)
-        return JSONResponse(status_code=status.HTTP_201_CREATED, content=userEntity(user_dict))
+        db.user.insert_one(user_dict)
+        stats.record_insert("user", user_dict)
+        list_cache.bump("user")
+        audit_log.record("create", "user", [user_dict["id"]])
+        return RawJSONResponse(status_code=status.HTTP_201_CREATED, content=userJson(user_dict))
     
     except InvalidUserException as e:
         raise e
     except Exception as e:
+        if is_timeout(e):
+            # A timeout is not the client's fault, keep it out of the 422
+            raise RequestTimeoutException() from e
         raise InvalidUserException(detail=str(e))
+
+
+@admin.post('/bulk')
+async def create_admin_users(request: BulkAdmin):
+    # Generating and hashing a password per user is slow, so the batch runs as a job
+    if not request.users or len(request.users) > settings.BULK_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Provide between 1 and {settings.BULK_MAX_DOCUMENTS} users"
+        )
+    job_id = job_queue.enqueue("provision_users", {"users": [user.model_dump() for user in request.users]})
+    return job_accepted(job_id)
+
+
+@job_handler("provision_users")
+def provision_users(params: dict, progress) -> dict:
+    from utils.passwords import generate_password
+    users = params["users"]
+    results = []
+    created = 0
+    try:
+        for done, user in enumerate(users, 1):
+            # Users created by an earlier attempt of this job are reported, not duplicated
+            existing_user = db.user.find_one(email_query(user["email"]), {"id": 1})
+            if existing_user:
+                results.append({"email": user["email"], "status": "exists", "id": existing_user.get("id")})
+            else:
+                user_dict = {
+                    **user,
+                    "email_normalized": normalize_email(user["email"]),
+                    "id": next_id('userid'),
+                    "password": hash_password(generate_password(8)),
+                    "role": "user",
+                    "whatsapp_api_token": None,
+                    "whatsapp_cloud_number_id": None,
+                }
+                try:
+                    db.user.insert_one(user_dict)
+                except DuplicateKeyError:
+                    results.append({"email": user["email"], "status": "exists"})
+                else:
+                    created += 1
+                    stats.record_insert("user", user_dict)
+                    audit_log.record("create", "user", [user_dict["id"]])
+                    results.append({"email": user["email"], "status": "created", "id": user_dict["id"]})
+            if done % 20 == 0 or done == len(users):
+                progress(done, len(users))
+    finally:
+        if created:
+            list_cache.bump("user")
+    return {"created": created, "results": results}
+
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, status, Query
+from typing import Optional
+from fastapi.responses import JSONResponse
+from config.db import read_db
+from schemas.audit import auditEntity
+from utils.audit import audit_log
+from utils.search import keyset_page, MAX_PAGE_SIZE
+
+audit_router = APIRouter(prefix="/api/v1/audit", tags=['Audit'])
+
+
+@audit_router.get('/')
+async def list_audit_events(
+    collection: Optional[str] = None,
+    target_id: Optional[int] = None,
+    action: Optional[str] = None,
+    after: Optional[str] = None,
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE)
+):
+    # Events are written in batches, so the newest ones may still be queued
+    query = {}
+    if collection:
+        query["collection"] = collection
+    if target_id is not None:
+        query["target_ids"] = target_id
+    if action:
+        query["action"] = action
+    result = keyset_page(read_db[audit_log.collection_name], query, "at", page_size, auditEntity, after)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=result)
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import JSONResponse
+from typing import List, Optional
+from config.db import read_db
+from utils.search import build_search_filter, count_matches, MAX_PAGE_SIZE
+
+directory_router = APIRouter(prefix="/api/v1/directory", tags=['Directory'])
+
+# Fields shared by users and panel members; secrets such as password are never projected
+DIRECTORY_FIELDS = {"_id": 0, "id": 1, "name": 1, "email": 1, "mobile_number": 1, "location": 1}
+DIRECTORY_TYPES = ("member", "user")
+
+
+def decode_directory_cursor(cursor: str) -> tuple:
+    # "<type>:<email>" of the last item returned
+    kind, _, email = cursor.partition(":")
+    if kind not in DIRECTORY_TYPES or not email:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return email, kind
+
+
+def directory_branch(kind: str, query: dict, page_size: int, after: str = None) -> list:
+    # Sorted and limited before the union, so each collection's email index returns at most
+    # one page in order and only 2 x page_size documents are merged
+    if after:
+        email, after_kind = decode_directory_cursor(after)
+        # Past the cursor on (email, type): the same email only counts for a later type
+        query = {"$and": [query, {"email": {"$gte" if kind > after_kind else "$gt": email}}]}
+    projection = {**DIRECTORY_FIELDS, "type": {"$literal": kind}}
+    if kind == "user":
+        projection["role"] = 1
+    return [
+        {"$match": query},
+        {"$sort": {"email": 1}},
+        {"$limit": page_size},
+        {"$project": projection},
+    ]
+
+
+def directory_pipeline(query: dict, page_size: int, after: str = None) -> list:
+    # Users and panel members are matched, tagged and paged in one aggregation (one round trip)
+    return directory_branch("user", query, page_size, after) + [
+        {"$unionWith": {"coll": "members", "pipeline": directory_branch("member", query, page_size, after)}},
+        {"$sort": {"email": 1, "type": 1}},
+        {"$limit": page_size},
+    ]
+
+
+@directory_router.get('/')
+async def search_directory(
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    location: Optional[List[str]] = Query(None),
+    mobile_number: Optional[List[int]] = Query(None),
+    after: Optional[str] = None,
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False
+):
+    query = build_search_filter(name, email, location, mobile_number)
+    items = list(read_db.user.aggregate(directory_pipeline(query, page_size, after)))
+    content = {
+        "items": items,
+        "next": f"{items[-1]['type']}:{items[-1]['email']}" if len(items) == page_size else None,
+        "page_size": page_size,
+    }
+    if include_total:
+        # Opt-in: counting costs a capped count per collection on top of the page
+        counts = [count_matches(read_db.user, query), count_matches(read_db.members, query)]
+        content["total"] = sum(total for total, _ in counts)
+        content["total_capped"] = any(capped for _, capped in counts)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=content)
@@ -0,0 +1,48 @@
+import asyncio
+import pymongo
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from config import settings
+from config.db import conn, pool_monitor
+from utils.hashing import hash_pool_stats
+from utils.health import loop_lag
+
+health_router = APIRouter(tags=['Health'])
+
+
+def _ping_mongo():
+    # Client-side deadline covering server selection and the round trip
+    with pymongo.timeout(settings.READY_PING_TIMEOUT_MS / 1000):
+        conn.admin.command("ping")
+
+
+@health_router.get('/healthz')
+async def healthz():
+    # Liveness: the process is up and its event loop is answering; dependencies are not checked
+    return {"status": "ok"}
+
+
+@health_router.get('/readyz')
+async def readyz():
+    checks = {}
+    try:
+        # On a thread so an unreachable MongoDB never blocks the event loop
+        await asyncio.to_thread(_ping_mongo)
+        checks["mongo"] = {"ok": True}
+    except Exception as e:
+        checks["mongo"] = {"ok": False, "error": str(e)}
+
+    pool = pool_monitor.stats()
+    checks["mongo_pool"] = {**pool, "ok": not pool["exhausted"]}
+
+    lag = loop_lag.stats()
+    checks["event_loop"] = {**lag, "ok": lag["max_lag_ms"] <= settings.READY_MAX_LOOP_LAG_MS}
+
+    hashing = hash_pool_stats()
+    checks["hash_pool"] = {**hashing, "ok": hashing["queued"] <= settings.READY_MAX_HASH_QUEUE}
+
+    ready = all(check["ok"] for check in checks.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "unavailable", "checks": checks}
+    )
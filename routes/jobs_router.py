@@ -0,0 +1,51 @@
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import Optional
+from fastapi.responses import JSONResponse
+from config.db import read_db
+from schemas.job import jobEntity
+from utils.jobs import job_queue
+from utils.search import keyset_page, MAX_PAGE_SIZE
+
+jobs_router = APIRouter(prefix="/api/v1/jobs", tags=['Jobs'])
+
+
+def job_accepted(job_id) -> JSONResponse:
+    # Response for endpoints that hand their work to the job queue
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"job_id": str(job_id), "status": "queued"},
+        headers={"Location": f"/api/v1/jobs/{job_id}"}
+    )
+
+
+@jobs_router.get('/')
+async def list_jobs(
+    type: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    after: Optional[str] = None,
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE)
+):
+    query = {}
+    if type:
+        query["type"] = type
+    if status_filter:
+        query["status"] = status_filter
+    result = keyset_page(read_db[job_queue.collection_name], query, "created_at", page_size, jobEntity, after)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=result)
+
+
+@jobs_router.get('/{job_id}')
+async def get_job(job_id: str):
+    try:
+        job = job_queue.get(ObjectId(job_id))
+    except InvalidId:
+        job = None
+    if job:
+        return JSONResponse(status_code=status.HTTP_200_OK, content=jobEntity(job))
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with id {job_id} not found"
+        )
@@ -1,21 +1,55 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, status
 from pymongo.collection import Collection
-from config.db import conn
+from config.db import db
 from models.login import LoginRequest
-from bcrypt import checkpw
+from utils.hashing import verify_password_async, needs_rehash, hash_password_async
+from utils.rate_limit import login_limiter
+from utils.login_cache import login_cache
+from utils.activity import activity_buffer
+from utils.soft_delete import ACTIVE
+from utils.emails import email_query, normalize_email
+import math
 
 login_router = APIRouter(prefix="/api/v1/login",tags=['Login'])
 
 @login_router.post('/')
-async def login(login_request: LoginRequest):
-    user_collection: Collection = conn.local.user
-    user = user_collection.find_one({"email": login_request.email})
+async def login(login_request: LoginRequest, request: Request):
+    # Keyed on the normalized email so changing case does not reset the failure count
+    limiter_keys = {"email": normalize_email(login_request.email), "ip": request.client.host if request.client else "unknown"}
+    retry_after = login_limiter.retry_after(limiter_keys)
+    if retry_after:
+        # Rejected before touching the database or bcrypt
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+    user_collection: Collection = db.user
+    user = user_collection.find_one({**email_query(login_request.email), **ACTIVE})
     
-    if user and checkpw(login_request.password.encode('utf-8'), user["password"].encode('utf-8')):
+    if user and login_cache.hit(user["id"], login_request.password, user["password"]):
+        # Verified moments ago against the same stored hash, skip bcrypt
+        login_limiter.record_success({"email": limiter_keys["email"]})
+        activity_buffer.record(user["id"])
+        return {"message": "Login Successful", "user_id": int(user["id"]),"user_role":str(user["role"])}
+    elif user and await verify_password_async(login_request.password, user["password"]):
+        login_limiter.record_success({"email": limiter_keys["email"]})
+        activity_buffer.record(user["id"])
+        if needs_rehash(user["password"]):
+            # Stored hash was made with a different cost, upgrade it while we have the password
+            user_collection.update_one(
+                {"_id": user["_id"], "password": user["password"]},
+                {"$set": {"password": await hash_password_async(login_request.password)}}
+            )
+        else:
+            login_cache.add(user["id"], login_request.password, user["password"])
         return {"message": "Login Successful", "user_id": int(user["id"]),"user_role":str(user["role"])}  # Adjust response as needed
     elif user:
+        login_limiter.record_failure(limiter_keys)
         raise HTTPException(status_code=401, detail="Invalid email or password")
     else:
+        login_limiter.record_failure(limiter_keys)
         raise HTTPException(status_code=404, detail="User not found")
     
 
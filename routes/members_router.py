@@ -1,37 +1,77 @@
-from fastapi import APIRouter, HTTPException, status, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, status, Request, Query
+from typing import List, Optional
+from fastapi.responses import JSONResponse, Response
 from models.members import Members,UpdateMember
-from config.db import conn
-from schemas.members import memberEntity, membersEntity
-from exceptions.exceptions import InvalidUserException
+from pymongo.errors import DuplicateKeyError
+from config.db import db, read_db
+from utils.ids import next_id
+from schemas.members import MemberOut, memberEntity, memberJson, membersJson
+from schemas.responses import RawJSONResponse
+from exceptions.exceptions import InvalidUserException, RequestTimeoutException, is_timeout
+from utils.search import build_search_filter, paginated_search, MAX_PAGE_SIZE
+from utils import stats
+from utils.list_cache import list_cache
+from utils.audit import audit_log
+from utils.soft_delete import ACTIVE, soft_delete, restore
+from utils.emails import email_query, normalize_email
+from utils.bulk import bulk_update, bulk_delete
+from models.bulk import BulkSelection, BulkUpdateMembers
 
 members = APIRouter(prefix="/api/v1/member", tags=['Panel_Members'])
 
-def get_next_sequence_value(sequence_name):
-    seq = conn.local.counters.find_one_and_update(
-        {"_id": sequence_name},
-        {"$inc": {"sequence_value": 1}},
-        upsert=True,
-        return_document=True
+
+def email_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Panel member with this email already exists"
     )
-    return seq["sequence_value"]
 
+@members.get('/', response_model=List[MemberOut])
+async def find_all_panel_members(request: Request):
+    version = list_cache.version("members")
+    cached = list_cache.get("members", version)
+    if cached is None:
+        # Read from the primary: the cached bytes must be at least as new as the version
+        members = list(db.members.find(ACTIVE))
+        if not members:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No panel members found"
+            )
+        cached = list_cache.put("members", version, membersJson(members))
+    if request.headers.get("if-none-match") == cached.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": cached.etag})
+    return Response(content=cached.body, media_type="application/json", headers={"ETag": cached.etag})
+    
+# Declared before '/{id}' so "search" is not taken for an id
+@members.get('/search')
+async def search_panel_members(
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    location: Optional[List[str]] = Query(None),
+    mobile_number: Optional[List[int]] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE)
+):
+    query = build_search_filter(name, email, location, mobile_number)
+    result = paginated_search(read_db.members, query, page, page_size, memberEntity)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=result)
 
-@members.get('/')
-async def find_all_panel_members():
-    members = list(conn.local.members.find())
-    if members:
-        return JSONResponse(status_code=status.HTTP_200_OK, content=membersEntity(members))
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No panel members found"
-        )
+# Also declared before '/{id}'; the patch is validated once and applied with a single bulk_write
+@members.patch('/bulk')
+async def bulk_update_panel_members(request: BulkUpdateMembers):
+    result = bulk_update("members", request, request.update.model_dump(exclude_unset=True))
+    return JSONResponse(status_code=status.HTTP_200_OK, content=result)
+
+@members.delete('/bulk')
+async def bulk_delete_panel_members(request: BulkSelection):
+    result = bulk_delete("members", request)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=result)
     
-@members.post('/')
+@members.post('/', status_code=status.HTTP_201_CREATED, response_model=MemberOut)
 async def create_panel_member(member: Members):
     try:
-        existing_member = conn.local.members.find_one({"email": member.email})
+        existing_member = db.members.find_one(email_query(member.email))
         if existing_member:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -39,18 +79,25 @@ async def create_panel_member(member: Members):
             )
         
         member_dict = member.model_dump()
-        member_dict['id'] = get_next_sequence_value('memberid')   # Assign sequential ID
-        conn.local.members.insert_one(member_dict)
-        return JSONResponse(status_code=status.HTTP_201_CREATED, content=memberEntity(member_dict))
+        member_dict['email_normalized'] = normalize_email(member.email)
+        member_dict['id'] = next_id('memberid')   # Assign time-ordered or sequential ID
+        db.members.insert_one(member_dict)
+        stats.record_insert("members", member_dict)
+        list_cache.bump("members")
+        audit_log.record("create", "members", [member_dict["id"]])
+        return RawJSONResponse(status_code=status.HTTP_201_CREATED, content=memberJson(member_dict))
     
     except InvalidUserException as e:
         raise e
     except Exception as e:
+        if is_timeout(e):
+            # A timeout is not the client's fault, keep it out of the 422
+            raise RequestTimeoutException() from e
         raise InvalidUserException(detail=str(e))
 
-@members.put('/{id}')
+@members.put('/{id}', response_model=MemberOut)
 async def update_panel_member(id: int, update_member: UpdateMember):
-    existing_member = conn.local.members.find_one({"id": id})
+    existing_member = db.members.find_one({"id": id, **ACTIVE})
     if not existing_member:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -62,26 +109,37 @@ async def update_panel_member(id: int, update_member: UpdateMember):
 
     # Create Member model to validate the updated data
     updated_member = UpdateMember(**{**existing_member, **member_data})
-    
-    result = conn.local.members.update_one(
-        {"id": id},
-        {"$set": member_data}
-    )
+    if 'email' in member_data:
+        member_data['email_normalized'] = normalize_email(member_data['email'])
+        if db.members.find_one({**email_query(member_data['email']), "id": {"$ne": id}}, {"_id": 1}):
+            raise email_conflict()
+
+    try:
+        result = db.members.update_one(
+            {"id": id, **ACTIVE},
+            {"$set": member_data}
+        )
+    except DuplicateKeyError:
+        # Taken by a concurrent write between the check and the update
+        raise email_conflict()
 
     if result.modified_count == 1:
-        updated_member = conn.local.members.find_one({"id": id})
-        return JSONResponse(status_code=status.HTTP_200_OK, content=memberEntity(updated_member))
+        stats.record_update("members", existing_member, member_data)
+        list_cache.bump("members")
+        audit_log.record("update", "members", [id], member_data)
+        updated_member = db.members.find_one({"id": id})
+        return RawJSONResponse(status_code=status.HTTP_200_OK, content=memberJson(updated_member))
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to update member"
         )
 
-@members.get('/{id}')
+@members.get('/{id}', response_model=MemberOut)
 async def get_panel_member(id: int):
-    member = conn.local.members.find_one({"id": id})
+    member = read_db.members.find_one({"id": id, **ACTIVE})
     if member:
-        return JSONResponse(status_code=status.HTTP_200_OK, content=memberEntity(member))
+        return RawJSONResponse(status_code=status.HTTP_200_OK, content=memberJson(member))
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,12 +148,30 @@ async def get_panel_member(id: int):
 
 @members.delete('/{id}')
 async def delete_panel_member(id: int):
-    result = conn.local.members.delete_one({"id": id})
+    # Soft delete: the document stays restorable until the purge job archives it
+    deleted_member = soft_delete("members", id, projection={"location": 1})
 
-    if result.deleted_count == 1:
+    if deleted_member:
+        stats.record_delete("members", deleted_member)
+        list_cache.bump("members")
+        audit_log.record("delete", "members", [id])
         return JSONResponse(status_code=status.HTTP_200_OK, content={"message": f"Panel Member with id {id} deleted successfully"})
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Panel Member with id {id} not found"
         )
+
+@members.post('/{id}/restore', response_model=MemberOut)
+async def restore_panel_member(id: int):
+    restored_member = restore("members", id)
+    if restored_member:
+        stats.record_insert("members", restored_member)
+        list_cache.bump("members")
+        audit_log.record("restore", "members", [id])
+        return RawJSONResponse(status_code=status.HTTP_200_OK, content=memberJson(restored_member))
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Deleted panel member with id {id} not found"
+        )
@@ -0,0 +1,40 @@
+from fastapi import APIRouter
+from utils.rate_limit import login_limiter
+from utils.hashing import hash_pool_stats
+from middleware.concurrency import concurrency_stats
+from middleware.deadline import deadline_stats
+from utils.startup import startup_timings
+from utils.activity import activity_buffer
+from utils.audit import audit_log
+
+metrics_router = APIRouter(prefix="/api/v1/metrics", tags=['Metrics'])
+
+
+@metrics_router.get('/login_limiter')
+async def login_limiter_metrics():
+    return login_limiter.stats()
+
+
+@metrics_router.get('/concurrency')
+async def concurrency_metrics():
+    return {"routes": concurrency_stats(), "hash_pool": hash_pool_stats()}
+
+
+@metrics_router.get('/deadlines')
+async def deadline_metrics():
+    return deadline_stats()
+
+
+@metrics_router.get('/startup')
+async def startup_metrics():
+    return startup_timings
+
+
+@metrics_router.get('/activity')
+async def activity_metrics():
+    return activity_buffer.stats()
+
+
+@metrics_router.get('/audit')
+async def audit_metrics():
+    return audit_log.stats()
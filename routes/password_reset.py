@@ -1,25 +1,34 @@
 from fastapi import APIRouter, HTTPException
+from config import settings
 from pymongo.collection import Collection
-from config.db import conn
-from models.password_reset import PasswordResetRequest
-from bcrypt import hashpw, gensalt
+from config.db import db
+from models.password_reset import PasswordResetRequest, BulkPasswordReset
+from utils.hashing import hash_password_async, hash_password
+from utils.login_cache import login_cache
+from utils.audit import audit_log
+from utils.soft_delete import ACTIVE
+from utils.emails import email_query
+from utils.jobs import job_handler, job_queue
+from routes.jobs_router import job_accepted
 
 password_reset_router = APIRouter(prefix="/api/v1/password_reset", tags=['Password Reset'])
 
 
 @password_reset_router.put('/{email}')
 async def reset_password(email: str,request: PasswordResetRequest):
-    user_collection: Collection = conn.local.user
-    user = user_collection.find_one({"email": email})
+    user_collection: Collection = db.user
+    user = user_collection.find_one({**email_query(email), **ACTIVE})
     
     if user:
-        new_hashed_password = hashpw(request.new_password.encode('utf-8'), gensalt()).decode('utf-8')
+        new_hashed_password = await hash_password_async(request.new_password)
         result = user_collection.update_one(
-            {"email": email},
+            {"_id": user["_id"], **ACTIVE},
             {"$set": {"password": new_hashed_password}}
         )
         
         if result.modified_count == 1:
+            login_cache.invalidate(user.get("id"))
+            audit_log.record("password_reset", "user", [user.get("id")])
             return {"message": "Password reset successful"}
         else:
             raise HTTPException(status_code=500, detail="Password reset failed")
@@ -28,3 +37,34 @@ async def reset_password(email: str,request: PasswordResetRequest):
     
 
 
+
+
+@password_reset_router.post('/bulk')
+async def reset_passwords(request: BulkPasswordReset):
+    # Replaces each password with a random one, e.g. after a credential leak; users then set
+    # their own through the reset endpoint. Hashing runs in a job, off the request path.
+    if not request.emails or len(request.emails) > settings.BULK_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {settings.BULK_MAX_DOCUMENTS} emails")
+    job_id = job_queue.enqueue("reset_passwords", {"emails": list(dict.fromkeys(request.emails))})
+    return job_accepted(job_id)
+
+
+@job_handler("reset_passwords")
+def reset_passwords_job(params: dict, progress) -> dict:
+    from utils.passwords import generate_password
+    emails = params["emails"]
+    results = []
+    reset = 0
+    for done, email in enumerate(emails, 1):
+        user = db.user.find_one({**email_query(email), **ACTIVE}, {"id": 1})
+        if user:
+            db.user.update_one({"_id": user["_id"]}, {"$set": {"password": hash_password(generate_password(16))}})
+            login_cache.invalidate(user.get("id"))
+            audit_log.record("password_reset", "user", [user.get("id")])
+            reset += 1
+            results.append({"email": email, "status": "reset"})
+        else:
+            results.append({"email": email, "status": "not_found"})
+        if done % 20 == 0 or done == len(emails):
+            progress(done, len(emails))
+    return {"reset": reset, "results": results}
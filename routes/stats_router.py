@@ -0,0 +1,17 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from utils.stats import read_stats, reconcile
+
+stats_router = APIRouter(prefix="/api/v1/stats", tags=['Stats'])
+
+
+@stats_router.get('/')
+async def get_stats():
+    # Served from precomputed counters, never from a scan of users or members
+    return JSONResponse(status_code=status.HTTP_200_OK, content=read_stats())
+
+
+@stats_router.post('/reconcile')
+async def reconcile_stats():
+    reconcile()
+    return JSONResponse(status_code=status.HTTP_200_OK, content=read_stats())
@@ -1,64 +1,78 @@
-from fastapi import APIRouter, HTTPException, status, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, status, Request, Query
+from typing import List, Optional
+from fastapi.responses import JSONResponse, Response
 from models.user import User, UpdateUser
-from config.db import conn
-from schemas.user import userEntity, usersEntity
-from bcrypt import hashpw, gensalt
-from exceptions.exceptions import InvalidUserException
-import random
-import string
+from pymongo.errors import DuplicateKeyError
+from config.db import db, read_db
+from utils.ids import next_id
+from schemas.user import UserOut, userEntity, userJson, usersJson
+from schemas.responses import RawJSONResponse
+from utils.hashing import hash_password_async
+from exceptions.exceptions import InvalidUserException, RequestTimeoutException, is_timeout
+from utils.search import build_search_filter, paginated_search, MAX_PAGE_SIZE
+from utils import stats
+from utils.list_cache import list_cache
+from utils.audit import audit_log
+from utils.soft_delete import ACTIVE, soft_delete, restore
+from utils.emails import email_query, normalize_email
+from utils.bulk import bulk_update, bulk_delete
+from models.bulk import BulkSelection, BulkUpdateUsers
 
 user = APIRouter(prefix="/api/v1/user", tags=['User'])
 
-def get_next_sequence_value(sequence_name):
-    seq = conn.local.counters.find_one_and_update(
-        {"_id": sequence_name},
-        {"$inc": {"sequence_value": 1}},
-        upsert=True,
-        return_document=True
-    )
-    return seq["sequence_value"]
 
+def email_conflict() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="User with this email already exists"
+    )
 
-def generate_password(length: int = 12) -> str:
-    if length < 8:
-        raise ValueError("Password length should be at least 8 characters.")
-    
-    # Ensure the password has at least one of each character type
-    characters = {
-        "uppercase": random.choice(string.ascii_uppercase),
-        "lowercase": random.choice(string.ascii_lowercase),
-        "digits": random.choice(string.digits),
-        "special": random.choice(string.punctuation)
-    }
-    
-    # Fill the rest of the password length with random choices from all character types
-    all_characters = string.ascii_letters + string.digits + string.punctuation
-    remaining_length = length - len(characters)
-    password = ''.join(random.choices(all_characters, k=remaining_length))
-    
-    # Combine and shuffle to ensure randomness
-    password_list = list(characters.values()) + list(password)
-    random.shuffle(password_list)
+@user.get('/', response_model=List[UserOut])
+async def find_all_users(request: Request):
+    version = list_cache.version("user")
+    cached = list_cache.get("user", version)
+    if cached is None:
+        # Read from the primary: the cached bytes must be at least as new as the version
+        users = list(db.user.find(ACTIVE))
+        if not users:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No users found"
+            )
+        cached = list_cache.put("user", version, usersJson(users))
+    if request.headers.get("if-none-match") == cached.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": cached.etag})
+    return Response(content=cached.body, media_type="application/json", headers={"ETag": cached.etag})
     
-    return ''.join(password_list)
+# Declared before '/{id}' so "search" is not taken for an id
+@user.get('/search')
+async def search_users(
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    location: Optional[List[str]] = Query(None),
+    mobile_number: Optional[List[int]] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE)
+):
+    query = build_search_filter(name, email, location, mobile_number)
+    result = paginated_search(read_db.user, query, page, page_size, userEntity)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=result)
 
+# Also declared before '/{id}'; the patch is validated once and applied with a single bulk_write
+@user.patch('/bulk')
+async def bulk_update_users(request: BulkUpdateUsers):
+    result = bulk_update("user", request, request.update.model_dump(exclude_unset=True))
+    return JSONResponse(status_code=status.HTTP_200_OK, content=result)
 
-@user.get('/')
-async def find_all_users():
-    users = list(conn.local.user.find())
-    if users:
-        return JSONResponse(status_code=status.HTTP_200_OK, content=usersEntity(users))
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No users found"
-        )
+@user.delete('/bulk')
+async def bulk_delete_users(request: BulkSelection):
+    result = bulk_delete("user", request)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=result)
     
-@user.post('/')
+@user.post('/', status_code=status.HTTP_201_CREATED, response_model=UserOut)
 async def create_user(user: User):
     try:
-        existing_user = conn.local.user.find_one({"email": user.email})
+        existing_user = db.user.find_one(email_query(user.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -66,22 +80,29 @@ async def create_user(user: User):
             )
         
         user_dict = user.model_dump()
-        user_dict['id'] = get_next_sequence_value('userid')   # Assign sequential ID
-        user_dict['password'] = hashpw(user.password.encode('utf-8'), gensalt()).decode('utf-8')
+        user_dict['email_normalized'] = normalize_email(user.email)
+        user_dict['id'] = next_id('userid')   # Assign time-ordered or sequential ID
+        user_dict['password'] = await hash_password_async(user.password)
         user_dict["role"]="user"
         user_dict["whatsapp_api_token"]=None
         user_dict["whatsapp_cloud_number_id"]=None
-        conn.local.user.insert_one(user_dict)
-        return JSONResponse(status_code=status.HTTP_201_CREATED, content=userEntity(user_dict))
+        db.user.insert_one(user_dict)
+        stats.record_insert("user", user_dict)
+        list_cache.bump("user")
+        audit_log.record("create", "user", [user_dict["id"]])
+        return RawJSONResponse(status_code=status.HTTP_201_CREATED, content=userJson(user_dict))
     
     except InvalidUserException as e:
         raise e
     except Exception as e:
+        if is_timeout(e):
+            # A timeout is not the client's fault, keep it out of the 422
+            raise RequestTimeoutException() from e
         raise InvalidUserException(detail=str(e))
 
-@user.put('/{id}')
+@user.put('/{id}', response_model=UserOut)
 async def update_user(id: int, update_user: UpdateUser):
-    existing_user = conn.local.user.find_one({"id": id})
+    existing_user = db.user.find_one({"id": id, **ACTIVE})
     if not existing_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -94,26 +115,37 @@ async def update_user(id: int, update_user: UpdateUser):
 
     # Create User model to validate the updated data
     updated_user = UpdateUser(**{**existing_user, **user_data})
-    
-    result = conn.local.user.update_one(
-        {"id": id},
-        {"$set": user_data}
-    )
+    if 'email' in user_data:
+        user_data['email_normalized'] = normalize_email(user_data['email'])
+        if db.user.find_one({**email_query(user_data['email']), "id": {"$ne": id}}, {"_id": 1}):
+            raise email_conflict()
+
+    try:
+        result = db.user.update_one(
+            {"id": id, **ACTIVE},
+            {"$set": user_data}
+        )
+    except DuplicateKeyError:
+        # Taken by a concurrent write between the check and the update
+        raise email_conflict()
 
     if result.modified_count == 1:
-        updated_user = conn.local.user.find_one({"id": id})
-        return JSONResponse(status_code=status.HTTP_200_OK, content=userEntity(updated_user))
+        stats.record_update("user", existing_user, user_data)
+        list_cache.bump("user")
+        audit_log.record("update", "user", [id], user_data)
+        updated_user = db.user.find_one({"id": id})
+        return RawJSONResponse(status_code=status.HTTP_200_OK, content=userJson(updated_user))
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to update user"
         )
 
-@user.get('/{id}')
+@user.get('/{id}', response_model=UserOut)
 async def get_user(id: int):
-    user = conn.local.user.find_one({"id": id})
+    user = read_db.user.find_one({"id": id, **ACTIVE})
     if user:
-        return JSONResponse(status_code=status.HTTP_200_OK, content=userEntity(user))
+        return RawJSONResponse(status_code=status.HTTP_200_OK, content=userJson(user))
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -122,12 +154,30 @@ async def get_user(id: int):
 
 @user.delete('/{id}')
 async def delete_user(id: int):
-    result = conn.local.user.delete_one({"id": id})
+    # Soft delete: the document stays restorable until the purge job archives it
+    deleted_user = soft_delete("user", id, projection={"location": 1, "role": 1})
 
-    if result.deleted_count == 1:
+    if deleted_user:
+        stats.record_delete("user", deleted_user)
+        list_cache.bump("user")
+        audit_log.record("delete", "user", [id])
         return JSONResponse(status_code=status.HTTP_200_OK, content={"message": f"User with id {id} deleted successfully"})
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id {id} not found"
         )
+
+@user.post('/{id}/restore', response_model=UserOut)
+async def restore_user(id: int):
+    restored_user = restore("user", id)
+    if restored_user:
+        stats.record_insert("user", restored_user)
+        list_cache.bump("user")
+        audit_log.record("restore", "user", [id])
+        return RawJSONResponse(status_code=status.HTTP_200_OK, content=userJson(restored_user))
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Deleted user with id {id} not found"
+        )
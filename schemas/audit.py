@@ -0,0 +1,12 @@
+from schemas.user import timestamp
+
+
+def auditEntity(item) -> dict:
+    return {
+        "id": str(item["_id"]),
+        "at": timestamp(item["at"]),
+        "action": item["action"],
+        "collection": item["collection"],
+        "target_ids": item["target_ids"],
+        "changes": item.get("changes"),
+    }
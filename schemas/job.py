@@ -0,0 +1,17 @@
+from schemas.user import timestamp
+
+
+def jobEntity(item) -> dict:
+    return {
+        "id": str(item["_id"]),
+        "type": item["type"],
+        "status": item["status"],
+        "progress": item["progress"],
+        "attempts": item["attempts"],
+        "max_attempts": item["max_attempts"],
+        "result": item.get("result"),
+        "error": item.get("error"),
+        "created_at": timestamp(item["created_at"]),
+        "updated_at": timestamp(item["updated_at"]),
+        "finished_at": timestamp(item.get("finished_at")),
+    }
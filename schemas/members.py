@@ -1,15 +1,33 @@
 import pymongo
+from typing import List, Optional
+from pydantic import BaseModel, TypeAdapter
+
+
+class MemberOut(BaseModel):
+    # Every field tolerates older documents; internal fields are not part of the model
+    id: Optional[int] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    mobile_number: Optional[int] = None
+    location: Optional[str] = None
+
+
+member_adapter = TypeAdapter(MemberOut)
+members_adapter = TypeAdapter(List[MemberOut])
+
+
+def memberJson(item) -> bytes:
+    return member_adapter.dump_json(member_adapter.validate_python(item))
+
+
+def membersJson(items) -> bytes:
+    return members_adapter.dump_json(members_adapter.validate_python(items))
+
 
 def memberEntity(item) -> dict:
-    return {
-        "id": item["id"],  # Assuming "id" is stored as an integer in MongoDB
-        "name": item["name"],
-        "email": item["email"],
-        "mobile_number":item["mobile_number"],
-        "location":item["location"]
-    }
+    return member_adapter.dump_python(member_adapter.validate_python(item), mode="json")
 
 def membersEntity(entity):
     if isinstance(entity, pymongo.collection.Collection):
         entity = list(entity.find())  # Convert Collection to list of documents
-    return [memberEntity(item) for item in entity]
\ No newline at end of file
+    return members_adapter.dump_python(members_adapter.validate_python(entity), mode="json")
@@ -0,0 +1,6 @@
+from starlette.responses import Response
+
+
+class RawJSONResponse(Response):
+    # For bodies already encoded by a TypeAdapter; skips JSONResponse's json.dumps pass
+    media_type = "application/json"
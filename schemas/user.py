@@ -1,21 +1,57 @@
 # schemas/user.py
 
 import pymongo
+from datetime import datetime, timezone
+from typing import List, Optional
+from pydantic import BaseModel, TypeAdapter, field_validator
+
+
+def timestamp(value):
+    # pymongo returns naive UTC datetimes
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+class UserOut(BaseModel):
+    # What the API returns for a user. Secrets (the password hash, the WhatsApp API token) and
+    # internal fields are not part of the model, so they can never be serialized. Every field
+    # tolerates older documents.
+    id: Optional[int] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+    mobile_number: Optional[int] = None
+    location: Optional[str] = None
+    role: Optional[str] = None
+    whatsapp_cloud_number_id: Optional[str] = None
+    # Written in batches after login, so they can trail a login by a few seconds
+    last_login: Optional[datetime] = None
+    login_count: int = 0
+
+    @field_validator('last_login')
+    def as_utc(cls, v):
+        return v.replace(tzinfo=timezone.utc) if v is not None and v.tzinfo is None else v
+
+
+# Built once; validation and JSON encoding then run in pydantic-core
+user_adapter = TypeAdapter(UserOut)
+users_adapter = TypeAdapter(List[UserOut])
+
+
+def userJson(item) -> bytes:
+    return user_adapter.dump_json(user_adapter.validate_python(item))
+
+
+def usersJson(items) -> bytes:
+    return users_adapter.dump_json(users_adapter.validate_python(items))
+
 
 def userEntity(item) -> dict:
-    return {
-        "id": item["id"],  # Assuming "id" is stored as an integer in MongoDB
-        "name": item["name"],
-        "email": item["email"],
-        "mobile_number":item["mobile_number"],
-        "location":item["location"],
-        "role":item["role"],
-        "password": item["password"],
-        "whatsapp_api_token": item["whatsapp_api_token"],
-        "whatsapp_cloud_number_id": item["whatsapp_cloud_number_id"]
-    }
+    return user_adapter.dump_python(user_adapter.validate_python(item), mode="json")
 
 def usersEntity(entity):
     if isinstance(entity, pymongo.collection.Collection):
         entity = list(entity.find())  # Convert Collection to list of documents
-    return [userEntity(item) for item in entity]
+    return users_adapter.dump_python(users_adapter.validate_python(entity), mode="json")
@@ -0,0 +1,61 @@
+import pytest
+import sys
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from pymongo import monitoring
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class CommandCounter(monitoring.CommandListener):
+    # Records the name of every command sent to MongoDB so tests can count round trips
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        self.commands.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# Registered globally so it is picked up by the client created in config.db
+command_counter = CommandCounter()
+monitoring.register(command_counter)
+
+# route -> list of command names issued by the last request made under db_budget
+round_trip_report = defaultdict(list)
+
+
+class RoundTripBudget:
+    def __init__(self, counter):
+        self.counter = counter
+
+    @contextmanager
+    def __call__(self, route: str, max_round_trips: int):
+        start = len(self.counter.commands)
+        yield
+        issued = self.counter.commands[start:]
+        round_trip_report[route] = issued
+        assert len(issued) <= max_round_trips, (
+            f"{route} issued {len(issued)} MongoDB commands "
+            f"(budget {max_round_trips}): {issued}"
+        )
+
+
+@pytest.fixture
+def db_budget():
+    # Usage: with db_budget("GET /api/v1/user/{id}", 1): client.get(...)
+    return RoundTripBudget(command_counter)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not round_trip_report:
+        return
+    terminalreporter.section("MongoDB round trips per route")
+    for route in sorted(round_trip_report):
+        issued = round_trip_report[route]
+        terminalreporter.write_line(f"{route}: {len(issued)} ({', '.join(issued)})")
@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime, timedelta
+from config.db import db
+from pymongo.errors import BulkWriteError
+from utils import activity
+from utils.activity import ActivityBuffer
+
+
+@pytest.fixture
+def users():
+    db.activity_test.drop()
+    db.activity_test.insert_many([{"id": 1}, {"id": 2}])
+    yield db.activity_test
+    db.activity_test.drop()
+
+
+def test_repeated_logins_are_coalesced(users):
+    buffer = ActivityBuffer("activity_test", max_entries=10)
+    first = datetime(2024, 1, 1, 9, 0)
+    buffer.record(1, first + timedelta(minutes=5))
+    buffer.record(1, first)
+    buffer.record(2, first)
+    assert buffer.stats()["pending"] == 2
+
+    buffer.flush()
+    assert buffer.stats() == {"pending": 0, "flushed": 2, "dropped": 0}
+    user = users.find_one({"id": 1})
+    assert user["login_count"] == 2
+    assert user["last_login"] == first + timedelta(minutes=5)
+
+    # A later flush never moves last_login backwards
+    buffer.record(1, first)
+    buffer.flush()
+    user = users.find_one({"id": 1})
+    assert user["login_count"] == 3
+    assert user["last_login"] == first + timedelta(minutes=5)
+
+
+def test_full_buffer_drops_new_users_only(users):
+    buffer = ActivityBuffer("activity_test", max_entries=1)
+    buffer.record(1)
+    buffer.record(1)
+    buffer.record(2)
+    assert buffer.stats() == {"pending": 1, "flushed": 0, "dropped": 1}
+
+
+def test_partial_flush_failure_requeues_only_failed_entries(users, monkeypatch):
+    class PartlyFailing:
+        # Applies every update except the second, like an unordered bulk_write with one write error
+        def bulk_write(self, operations, ordered=True):
+            users.bulk_write([operation for index, operation in enumerate(operations) if index != 1], ordered=ordered)
+            raise BulkWriteError({"writeErrors": [{"index": 1, "code": 2, "errmsg": "failed"}], "writeConcernErrors": []})
+
+    buffer = ActivityBuffer("activity_test", max_entries=10)
+    buffer.record(1)
+    buffer.record(2)
+    monkeypatch.setattr(activity, "db", {"activity_test": PartlyFailing()})
+    buffer.flush()
+    assert buffer.stats() == {"pending": 1, "flushed": 1, "dropped": 0}
+
+    monkeypatch.undo()
+    buffer.flush()
+    assert users.find_one({"id": 1})["login_count"] == 1
+    assert users.find_one({"id": 2})["login_count"] == 1
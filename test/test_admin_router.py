@@ -5,17 +5,17 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from main import app
-from config.db import conn
+from config.db import db
 client = TestClient(app)
 
 @pytest.fixture(scope="module")
 def setup_db():
     # Ensure the user and counters collections are empty before tests
-    conn.local.user.drop()
-    conn.local.counters.drop()  # Ensure counters collection is also empty for sequence values
+    db.user.drop()
+    db.counters.drop()  # Ensure counters collection is also empty for sequence values
     yield
-    conn.local.user.drop()
-    conn.local.counters.drop()
+    db.user.drop()
+    db.counters.drop()
 
 def test_create_admin_user(setup_db):
     admin_data = {
@@ -90,3 +90,16 @@ def test_create_admin_user_invalid_mobile_number(setup_db):
 
     assert response.status_code == 422  # Unprocessable Entity for validation errors
     assert "detail" in response.json()  # Check for the presence of validation error details
+
+def test_create_admin_user_round_trip_budget(setup_db, db_budget):
+    admin_data = {
+        "name": "Budget Admin",
+        "email": "budget.admin@example.com",
+        "mobile_number": 1234567899,
+        "location": "Test Location"
+    }
+
+    with db_budget("POST /api/v1/admin/", 5):
+        response = client.post("/api/v1/admin/", json=admin_data)
+
+    assert response.status_code == 201
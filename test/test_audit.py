@@ -0,0 +1,93 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from config.db import db
+from pymongo.errors import ServerSelectionTimeoutError
+from utils.audit import AuditLog, audit_log
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def setup_db():
+    db.members.drop()
+    db[audit_log.collection_name].drop()
+    yield
+    db.members.drop()
+    db[audit_log.collection_name].drop()
+
+
+def test_events_are_written_in_batches():
+    db.audit_test.drop()
+    log = AuditLog("audit_test", max_events=100, batch_size=2)
+    for target_id in (1, 2, 3):
+        log.record("delete", "user", [target_id])
+    assert db.audit_test.count_documents({}) == 0
+
+    log.flush()
+    assert db.audit_test.count_documents({}) == 3
+    assert log.stats() == {"queued": 0, "written": 3, "inline_flushes": 0, "dropped": 0}
+    db.audit_test.drop()
+
+
+def test_full_queue_is_written_by_the_recording_request():
+    db.audit_test.drop()
+    log = AuditLog("audit_test", max_events=2, batch_size=2)
+    log.record("create", "user", [1])
+    log.record("create", "user", [2])
+    assert db.audit_test.count_documents({}) == 2
+    assert log.stats()["inline_flushes"] == 1
+    db.audit_test.drop()
+
+
+def test_queue_is_capped_when_mongodb_is_unavailable(monkeypatch):
+    log = AuditLog("audit_test", max_events=2, batch_size=2)
+
+    def unavailable(*args, **kwargs):
+        raise ServerSelectionTimeoutError("no servers")
+
+    monkeypatch.setattr(log.collection.__class__, "insert_many", unavailable)
+    for target_id in range(5):
+        log.record("create", "user", [target_id])
+    assert log.stats()["queued"] == 2
+    assert log.stats()["dropped"] == 3
+    # The newest events are the ones kept
+    assert [event["target_ids"] for event in log._queue] == [[3], [4]]
+
+
+def test_audit_endpoint_lists_member_history(setup_db):
+    response = client.post("/api/v1/member/", json={
+        "name": "Audited",
+        "email": "audited@example.com",
+        "mobile_number": 5554443339,
+        "location": "Pune"
+    })
+    member_id = response.json()["id"]
+    client.put(f"/api/v1/member/{member_id}", json={"location": "Delhi"})
+    audit_log.flush()
+
+    response = client.get("/api/v1/audit/", params={"collection": "members", "target_id": member_id})
+    assert response.status_code == 200
+    data = response.json()
+    # Newest first
+    assert [event["action"] for event in data["items"]] == ["update", "create"]
+    assert data["items"][0]["changes"] == {"location": "Delhi"}
+    assert data["next"] is None
+
+    first = client.get("/api/v1/audit/", params={"collection": "members", "target_id": member_id, "page_size": 1}).json()
+    assert [event["action"] for event in first["items"]] == ["update"]
+    second = client.get("/api/v1/audit/", params={
+        "collection": "members", "target_id": member_id, "page_size": 1, "after": first["next"]
+    }).json()
+    assert [event["action"] for event in second["items"]] == ["create"]
+    assert client.get("/api/v1/audit/", params={"after": "not-a-cursor"}).status_code == 400
+
+
+def test_secrets_are_redacted_from_changes():
+    db.audit_test.drop()
+    log = AuditLog("audit_test", max_events=100, batch_size=10)
+    log.record("update", "user", [1], {"whatsapp_api_token": "SECRET-TOKEN", "password": "hash", "location": "Goa"})
+    log.flush()
+    event = db.audit_test.find_one()
+    assert event["changes"] == {"whatsapp_api_token": "[redacted]", "password": "[redacted]", "location": "Goa"}
+    db.audit_test.drop()
@@ -0,0 +1,43 @@
+import pytest
+from config import settings
+from exceptions.exceptions import InvalidUserException
+from models.user import User
+from utils import breached_passwords
+from utils.breached_passwords import BloomFilter, build_filter
+
+
+@pytest.fixture
+def filter_file(tmp_path):
+    source = tmp_path / "breached.txt"
+    source.write_text("Password123!\nWelcome@2024\n\nQwerty@12345\n")
+    output = tmp_path / "breached.bloom"
+    summary = build_filter(str(source), str(output), false_positive_rate=0.0001)
+    assert summary["passwords"] == 3
+    return str(output)
+
+
+def test_filter_finds_listed_passwords(filter_file):
+    bloom = BloomFilter(filter_file)
+    assert "Password123!" in bloom
+    assert "Qwerty@12345" in bloom
+    assert "Unlisted#Pass99" not in bloom
+    bloom.close()
+
+
+def test_invalid_file_is_rejected(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a filter at all, just some bytes")
+    with pytest.raises(ValueError):
+        BloomFilter(str(path))
+
+
+def test_validator_rejects_breached_password(filter_file, monkeypatch):
+    monkeypatch.setattr(settings, "BREACHED_PASSWORD_FILTER", filter_file)
+    monkeypatch.setattr(breached_passwords, "_filter", None)
+    monkeypatch.setattr(breached_passwords, "_loaded", False)
+    user = {"name": "Breach", "email": "breach@example.com", "mobile_number": 9876543210, "location": "Pune"}
+
+    with pytest.raises(InvalidUserException) as error:
+        User(**user, password="Password123!")
+    assert "breached" in error.value.detail
+    assert User(**user, password="Unlisted#Pass99").password == "Unlisted#Pass99"
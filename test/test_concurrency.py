@@ -0,0 +1,83 @@
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from middleware.concurrency import ConcurrencyLimitMiddleware, RouteLimit, parse_limits
+
+
+def test_parse_limits():
+    limits = parse_limits("POST /api/v1/login/=2:4, PUT /api/v1/password_reset/*=1:0")
+    assert [(limit.method, limit.path, limit.max_concurrent, limit.max_queued) for limit in limits] == [
+        ("POST", "/api/v1/login/", 2, 4),
+        ("PUT", "/api/v1/password_reset/", 1, 0),
+    ]
+    assert limits[1].matches("PUT", "/api/v1/password_reset/test@example.com")
+    assert not limits[0].matches("GET", "/api/v1/login/")
+
+
+def test_queued_requests_are_admitted_in_order():
+    async def scenario():
+        limit = RouteLimit("POST /slow", max_concurrent=1, max_queued=2)
+        order = []
+
+        async def request(name):
+            assert await limit.acquire(timeout=1)
+            order.append(name)
+            await asyncio.sleep(0.01)
+            limit.release()
+
+        await asyncio.gather(request("a"), request("b"), request("c"))
+        return limit, order
+
+    limit, order = asyncio.run(scenario())
+    assert order == ["a", "b", "c"]
+    assert limit.stats()["admitted"] == 3
+    assert limit.stats()["queued"] == 0
+    assert limit.active == 0
+
+
+def test_sheds_when_queue_is_full():
+    async def scenario():
+        limit = RouteLimit("POST /slow", max_concurrent=1, max_queued=0)
+        assert await limit.acquire(timeout=1)
+        admitted = await limit.acquire(timeout=1)
+        limit.release()
+        return limit, admitted
+
+    limit, admitted = asyncio.run(scenario())
+    assert not admitted
+    assert limit.stats()["shed"] == 1
+
+
+def test_sheds_when_queue_wait_times_out():
+    async def scenario():
+        limit = RouteLimit("POST /slow", max_concurrent=1, max_queued=1)
+        assert await limit.acquire(timeout=1)
+        admitted = await limit.acquire(timeout=0.01)
+        limit.release()
+        return limit, admitted
+
+    limit, admitted = asyncio.run(scenario())
+    assert not admitted
+    assert limit.stats()["queued"] == 0
+    assert limit.active == 0
+
+
+def test_middleware_returns_503_with_retry_after():
+    limit = RouteLimit("GET /busy", max_concurrent=0, max_queued=0)
+    app = FastAPI()
+
+    @app.get("/busy")
+    async def busy():
+        return {"ok": True}
+
+    @app.get("/free")
+    async def free():
+        return {"ok": True}
+
+    app.add_middleware(ConcurrencyLimitMiddleware, limits=[limit], queue_timeout=0, retry_after=3)
+    client = TestClient(app)
+
+    response = client.get("/busy")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert client.get("/free").status_code == 200
@@ -0,0 +1,128 @@
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pymongo import _csot
+from pymongo.errors import ExecutionTimeout
+from middleware.deadline import DeadlineMiddleware, parse_deadlines
+from middleware.idempotency import IdempotencyMiddleware
+from utils.idempotency import IdempotencyStore
+from config.db import db
+from config import settings
+from main import app
+import routes.user
+
+
+def test_parse_deadlines():
+    deadlines = parse_deadlines("PATCH /api/v1/user/bulk=60000, GET /api/v1/user/*=2000")
+    assert [(deadline.method, deadline.path, deadline.milliseconds) for deadline in deadlines] == [
+        ("PATCH", "/api/v1/user/bulk", 60000),
+        ("GET", "/api/v1/user/", 2000),
+    ]
+    middleware = DeadlineMiddleware(None, deadlines=deadlines, default_ms=5000)
+    assert middleware.deadline_ms("GET", "/api/v1/user/7") == 2000
+    assert middleware.deadline_ms("POST", "/api/v1/user/") == 5000
+
+
+def test_request_past_its_deadline_gets_504():
+    slow_app = FastAPI()
+
+    @slow_app.get("/slow")
+    async def slow():
+        await asyncio.sleep(1)
+        return {"ok": True}
+
+    @slow_app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    slow_app.add_middleware(DeadlineMiddleware, deadlines=parse_deadlines("GET /slow=20"), default_ms=1000)
+    client = TestClient(slow_app)
+
+    response = client.get("/slow")
+    assert response.status_code == 504
+    assert response.json() == {"message": "Request did not complete within its deadline"}
+    assert client.get("/fast").status_code == 200
+
+
+def test_client_disconnect_cancels_the_request():
+    cancelled = []
+    slow_app = FastAPI()
+
+    @slow_app.get("/slow")
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    middleware = DeadlineMiddleware(slow_app, deadlines=[], default_ms=5000)
+    sent = []
+
+    async def scenario():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.sleep(0.05)  # the client hangs up while the route is still waiting
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/slow", "headers": [], "query_string": b""}
+        await asyncio.wait_for(middleware(scope, receive, send), 0.5)
+
+    asyncio.run(scenario())
+    assert cancelled == [True]
+    assert sent == []
+
+
+def test_create_user_timeout_is_504_not_422(monkeypatch):
+    def timed_out(name):
+        raise ExecutionTimeout("operation exceeded time limit", 50)
+
+    monkeypatch.setattr(routes.user, "next_id", timed_out)
+    response = TestClient(app).post("/api/v1/user/", json={
+        "name": "Slow Query",
+        "email": "slow.query@example.com",
+        "mobile_number": 9876543210,
+        "location": "Bangalore",
+        "password": "Slow@12345",
+    })
+    assert response.status_code == 504
+    assert response.json() == {"message": "Request did not complete within its deadline"}
+
+
+def test_idempotent_request_timing_out_can_be_retried():
+    remaining_at_abandon = []
+
+    class Store(IdempotencyStore):
+        def _abandon(self, key):
+            remaining_at_abandon.append(_csot.remaining())
+            super()._abandon(key)
+
+    store = Store(db, ttl=settings.IDEMPOTENCY_TTL_SECONDS, max_entries=10)
+    slow = {"sleep": 1}
+    slow_app = FastAPI()
+
+    @slow_app.post("/create", status_code=201)
+    async def create():
+        await asyncio.sleep(slow["sleep"])
+        return {"created": True}
+
+    slow_app.add_middleware(IdempotencyMiddleware, routes="POST /create", store=store)
+    slow_app.add_middleware(DeadlineMiddleware, deadlines=[], default_ms=50)
+    client = TestClient(slow_app)
+    db.idempotency_keys.delete_many({})
+
+    response = client.post("/create", json={}, headers={"Idempotency-Key": "timed-out"})
+    assert response.status_code == 504
+    assert remaining_at_abandon and remaining_at_abandon[0] > 0
+
+    slow["sleep"] = 0
+    retry = client.post("/create", json={}, headers={"Idempotency-Key": "timed-out"})
+    assert retry.status_code == 201
+    assert retry.json() == {"created": True}
+    db.idempotency_keys.delete_many({})
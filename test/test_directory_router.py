@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from config.db import db
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def setup_db():
+    db.user.drop()
+    db.members.drop()
+    db.user.insert_one({
+        "id": 1,
+        "name": "Shared Person",
+        "email": "shared@example.com",
+        "email_normalized": "shared@example.com",
+        "mobile_number": 1234567890,
+        "location": "Pune",
+        "password": "hashed",
+        "role": "user"
+    })
+    db.members.insert_many([
+        {"id": 1, "name": "Shared Person", "email": "shared@example.com", "email_normalized": "shared@example.com", "mobile_number": 1234567890, "location": "Pune"},
+        {"id": 2, "name": "Member Only", "email": "member@example.com", "email_normalized": "member@example.com", "mobile_number": 1234567891, "location": "Delhi"},
+    ])
+    yield
+    db.user.drop()
+    db.members.drop()
+
+def test_directory_finds_person_in_both_collections(setup_db):
+    response = client.get("/api/v1/directory/", params={"email": "shared@example.com", "include_total": True})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+    assert [item["type"] for item in data["items"]] == ["member", "user"]
+    assert all("password" not in item for item in data["items"])
+
+def test_directory_pagination(setup_db):
+    first = client.get("/api/v1/directory/", params={"page_size": 2, "include_total": True}).json()
+    assert first["total"] == 3
+    assert [(item["email"], item["type"]) for item in first["items"]] == [
+        ("member@example.com", "member"), ("shared@example.com", "member")
+    ]
+
+    second = client.get("/api/v1/directory/", params={"page_size": 2, "after": first["next"]}).json()
+    assert [(item["email"], item["type"]) for item in second["items"]] == [("shared@example.com", "user")]
+    assert second["next"] is None
+    assert "total" not in second
+    assert client.get("/api/v1/directory/", params={"after": "nobody"}).status_code == 400
@@ -0,0 +1,86 @@
+import pytest
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from main import app
+from config.db import db
+from utils.emails import migrate_emails, normalize_email
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def setup_db():
+    db.user.drop()
+    db.members.drop()
+    yield
+    db.user.drop()
+    db.members.drop()
+
+
+def test_normalize_email():
+    assert normalize_email("  John.Doe@Example.COM ") == "john.doe@example.com"
+
+
+def test_email_lookups_ignore_case(setup_db):
+    response = client.post("/api/v1/user/", json={
+        "name": "Mixed Case",
+        "email": "Mixed.Case@Example.com",
+        "mobile_number": 9876543211,
+        "location": "Pune",
+        "password": "Password123!"
+    })
+    assert response.status_code == 201
+    # Stored as entered; pydantic only lowercases the domain
+    assert response.json()["email"] == "Mixed.Case@example.com"
+
+    duplicate = client.post("/api/v1/user/", json={
+        "name": "Mixed Case",
+        "email": "mixed.case@example.com",
+        "mobile_number": 9876543211,
+        "location": "Pune",
+        "password": "Password123!"
+    })
+    assert duplicate.status_code == 422
+
+    login = client.post("/api/v1/login/", json={"email": "MIXED.case@example.com", "password": "Password123!"})
+    assert login.status_code == 200
+
+    search = client.get("/api/v1/user/search", params={"email": "mixed.CASE@"})
+    assert search.json()["total"] == 1
+
+
+def test_migration_backfills_and_sets_aside_duplicates(setup_db):
+    db.members.insert_many([
+        {"id": 1, "name": "First", "email": "Same@Example.com", "location": "Pune"},
+        {"id": 2, "name": "Second", "email": "same@example.com", "location": "Pune"},
+        {"id": 3, "name": "Other", "email": "Other@Example.com", "location": "Goa"},
+    ])
+
+    summary = migrate_emails(batch_size=2)
+    assert summary["members"] == {"backfilled": 2, "duplicates": 1}
+    assert db.members.find_one({"id": 1})["email_normalized"] == "same@example.com"
+    assert db.members.find_one({"id": 3})["email_normalized"] == "other@example.com"
+    duplicate = db.members.find_one({"id": 2})
+    assert duplicate["duplicate_of"] == 1
+    assert "deleted_at" in duplicate
+    assert "email_normalized" not in duplicate
+
+    # Running it again finds nothing left to do
+    assert migrate_emails(batch_size=2)["members"] == {"backfilled": 0, "duplicates": 0}
+
+
+def test_migration_keeps_live_account_over_older_tombstone(setup_db):
+    db.user.insert_many([
+        {"id": 1, "name": "Old", "email": "john@x.com", "location": "Pune", "deleted_at": datetime.now(timezone.utc)},
+        {"id": 2, "name": "New", "email": "John@x.com", "location": "Pune"},
+    ])
+
+    summary = migrate_emails(batch_size=10)
+    assert summary["user"] == {"backfilled": 1, "duplicates": 1}
+    live = db.user.find_one({"id": 2})
+    assert live["email_normalized"] == "john@x.com"
+    assert live.get("deleted_at") is None
+    assert "duplicate_of" not in live
+    tombstone = db.user.find_one({"id": 1})
+    assert tombstone["duplicate_of"] == 2
+    assert "email_normalized" not in tombstone
@@ -0,0 +1,48 @@
+import pytest
+from bcrypt import hashpw, gensalt
+from config.db import db
+from utils import hashing
+
+
+@pytest.fixture
+def rounds():
+    original = hashing.get_rounds()
+    hashing.set_rounds(5)
+    yield 5
+    hashing.set_rounds(original)
+
+
+def test_hash_password_uses_configured_rounds(rounds):
+    hashed_password = hashing.hash_password("Admin@12345")
+    assert hashing.hash_rounds(hashed_password) == rounds
+    assert hashing.verify_password("Admin@12345", hashed_password)
+    assert not hashing.verify_password("Wrong@12345", hashed_password)
+
+
+def test_needs_rehash(rounds):
+    assert not hashing.needs_rehash(hashpw(b"Admin@12345", gensalt(rounds)).decode('utf-8'))
+    assert hashing.needs_rehash(hashpw(b"Admin@12345", gensalt(4)).decode('utf-8'))
+    assert hashing.needs_rehash("not-a-bcrypt-hash")
+    # A stronger hash, e.g. from a worker with a higher cost, is never downgraded
+    assert not hashing.needs_rehash(hashpw(b"Admin@12345", gensalt(rounds + 1)).decode('utf-8'))
+
+
+def test_calibrated_rounds_are_shared(monkeypatch):
+    db.app_settings.delete_many({})
+    calibrations = []
+
+    def calibrate(target_ms, min_rounds, max_rounds):
+        calibrations.append(target_ms)
+        return 6
+
+    monkeypatch.setattr(hashing, "calibrate_rounds", calibrate)
+    assert hashing.shared_calibrated_rounds(50) == 6
+    # Later workers use the stored cost instead of calibrating again
+    assert hashing.shared_calibrated_rounds(50) == 6
+    assert calibrations == [50]
+    db.app_settings.delete_many({})
+
+
+def test_calibrate_rounds_stays_within_bounds():
+    assert hashing.calibrate_rounds(target_ms=0, min_rounds=4, max_rounds=6) == 4
+    assert hashing.calibrate_rounds(target_ms=10 ** 9, min_rounds=4, max_rounds=6) == 6
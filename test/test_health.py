@@ -0,0 +1,66 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from main import app
+from config import settings
+from config.db import PoolMonitor
+from utils.health import LoopLagMonitor
+
+client = TestClient(app)
+
+
+def test_healthz():
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_readyz_reports_each_check():
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert set(data["checks"]) == {"mongo", "mongo_pool", "event_loop", "hash_pool"}
+    assert {"open", "checked_out", "available", "max_size", "exhausted", "servers"} <= set(data["checks"]["mongo_pool"])
+
+
+def test_pool_is_exhausted_only_when_one_server_is_full(monkeypatch):
+    monkeypatch.setattr(settings, "MONGO_MAX_POOL_SIZE", 2)
+    monitor = PoolMonitor()
+    primary, secondary = ("db-0", 27017), ("db-1", 27017)
+    for address in (primary, secondary):
+        monitor.connection_created(SimpleNamespace(address=address))
+        monitor.connection_checked_out(SimpleNamespace(address=address))
+    # 2 checked out in total, but neither pool is at its limit of 2
+    assert monitor.stats()["checked_out"] == 2
+    assert monitor.stats()["exhausted"] == []
+
+    monitor.connection_created(SimpleNamespace(address=secondary))
+    monitor.connection_checked_out(SimpleNamespace(address=secondary))
+    assert monitor.stats()["exhausted"] == ["db-1:27017"]
+    assert monitor.stats()["servers"]["db-0:27017"] == {"open": 1, "checked_out": 1, "available": 0}
+
+
+def test_readyz_fails_when_a_threshold_is_exceeded(monkeypatch):
+    monkeypatch.setattr(settings, "READY_MAX_HASH_QUEUE", -1)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    data = response.json()
+    assert data["status"] == "unavailable"
+    assert data["checks"]["hash_pool"]["ok"] is False
+
+
+def test_loop_lag_monitor_sees_a_blocked_loop(monkeypatch):
+    monkeypatch.setattr("utils.health.SAMPLE_INTERVAL_SECONDS", 0.01)
+
+    async def scenario():
+        monitor = LoopLagMonitor()
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)  # block the loop
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+        return monitor.stats()
+
+    assert asyncio.run(scenario())["max_lag_ms"] >= 50
@@ -0,0 +1,79 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from config.db import db
+from config import settings
+from utils.idempotency import IdempotencyStore
+from datetime import datetime, timedelta, timezone
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def setup_db():
+    db.user.drop()
+    db.members.drop()
+    db.counters.drop()
+    db.idempotency_keys.drop()
+    yield
+    db.user.drop()
+    db.members.drop()
+    db.counters.drop()
+    db.idempotency_keys.drop()
+
+def test_create_user_retry_replays_original_response(setup_db):
+    user_data = {
+        "name": "Retry User",
+        "email": "retryuser@example.com",
+        "mobile_number": 1234567890,
+        "location": "Test Location",
+        "password": "Password123!"
+    }
+    headers = {"Idempotency-Key": "create-retry-user"}
+
+    first = client.post("/api/v1/user/", json=user_data, headers=headers)
+    second = client.post("/api/v1/user/", json=user_data, headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert db.user.count_documents({"email": "retryuser@example.com"}) == 1
+
+def test_create_member_key_reused_with_different_body(setup_db):
+    member_data = {
+        "name": "Retry Member",
+        "email": "retrymember@example.com",
+        "mobile_number": 1234567890,
+        "location": "Test Location"
+    }
+    headers = {"Idempotency-Key": "create-retry-member"}
+
+    assert client.post("/api/v1/member/", json=member_data, headers=headers).status_code == 201
+    response = client.post("/api/v1/member/", json={**member_data, "location": "Elsewhere"}, headers=headers)
+
+    assert response.status_code == 422
+    assert response.json() == {"detail": "Idempotency-Key was already used with a different request body"}
+
+def test_requests_without_key_are_not_replayed(setup_db):
+    member_data = {
+        "name": "Plain Member",
+        "email": "plainmember@example.com",
+        "mobile_number": 1234567890,
+        "location": "Test Location"
+    }
+    assert client.post("/api/v1/member/", json=member_data).status_code == 201
+    assert client.post("/api/v1/member/", json=member_data).status_code == 422
+
+def test_stale_claim_is_taken_over_by_a_retry(setup_db):
+    store = IdempotencyStore(db, ttl=settings.IDEMPOTENCY_TTL_SECONDS, max_entries=10, lease=30)
+    assert store.begin("crashed-attempt", "body") is None
+    # The first attempt never completes or releases the key
+    assert store.begin("crashed-attempt", "body")["completed"] is False
+
+    db.idempotency_keys.update_one(
+        {"_id": "crashed-attempt"},
+        {"$set": {"claimed_at": datetime.now(timezone.utc) - timedelta(seconds=31)}}
+    )
+    assert store.begin("crashed-attempt", "body") is None
+    store.complete("crashed-attempt", "body", 201, "application/json", b"{}")
+    assert db.idempotency_keys.find_one({"_id": "crashed-attempt"})["completed"] is True
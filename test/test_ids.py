@@ -0,0 +1,58 @@
+import pytest
+from datetime import datetime
+from config.db import db
+from utils.ids import SnowflakeGenerator, WorkerIdLease, EPOCH_MS, SEQUENCE_BITS, WORKER_BITS, MAX_WORKER_ID
+
+
+def test_ids_are_unique_and_increasing():
+    generator = SnowflakeGenerator(worker_id=7)
+    ids = [generator.next_id() for _ in range(10000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(0 < id < 2 ** 63 for id in ids)
+
+
+def test_id_layout():
+    generator = SnowflakeGenerator(worker_id=7)
+    generator._now_ms = lambda: EPOCH_MS + 1000
+    first, second = generator.next_id(), generator.next_id()
+    assert first >> (WORKER_BITS + SEQUENCE_BITS) == 1000
+    assert (first >> SEQUENCE_BITS) & MAX_WORKER_ID == 7
+    assert second - first == 1
+
+
+def test_workers_never_collide():
+    now = lambda: EPOCH_MS + 5
+    first, second = SnowflakeGenerator(worker_id=1), SnowflakeGenerator(worker_id=2)
+    first._now_ms = second._now_ms = now
+    assert first.next_id() != second.next_id()
+
+
+def test_invalid_worker_id():
+    with pytest.raises(ValueError):
+        SnowflakeGenerator(worker_id=MAX_WORKER_ID + 1)
+
+
+@pytest.fixture
+def leases():
+    db.worker_ids_test.drop()
+    yield
+    db.worker_ids_test.drop()
+
+
+def test_processes_lease_distinct_worker_ids(leases):
+    first, second = WorkerIdLease("worker_ids_test", 60), WorkerIdLease("worker_ids_test", 60)
+    assert {first.acquire(), second.acquire()} == {0, 1}
+    assert first.valid() and second.valid()
+
+
+def test_expired_lease_is_taken_over(leases):
+    stalled, other = WorkerIdLease("worker_ids_test", 60), WorkerIdLease("worker_ids_test", 60)
+    worker_id = stalled.acquire()
+    db.worker_ids_test.update_one({"_id": worker_id}, {"$set": {"expires_at": datetime(2000, 1, 1)}})
+
+    assert other.acquire() == worker_id
+    # The stalled process notices on its next renewal and gives the id up
+    stalled.renew()
+    assert not stalled.valid()
+    assert stalled.worker_id is None
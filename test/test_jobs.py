@@ -0,0 +1,122 @@
+import pytest
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from main import app
+from config import settings
+from config.db import db
+from utils.jobs import JOB_HANDLERS, job_handler, job_queue
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def setup_db(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BACKOFF_SECONDS", 0)
+    db.user.drop()
+    db.jobs.drop()
+    yield
+    db.user.drop()
+    db.jobs.drop()
+
+
+def test_bulk_provisioning_runs_as_a_job(setup_db):
+    users = [
+        {"name": "Jobone", "email": "jobone@example.com", "mobile_number": 9876543201, "location": "Pune"},
+        {"name": "Jobtwo", "email": "jobtwo@example.com", "mobile_number": 9876543202, "location": "Pune"},
+    ]
+    response = client.post("/api/v1/admin/bulk", json={"users": users})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["location"] == f"/api/v1/jobs/{job_id}"
+    assert client.get(f"/api/v1/jobs/{job_id}").json()["status"] == "queued"
+    assert db.user.count_documents({}) == 0
+
+    job_queue.run_pending()
+
+    job = client.get(f"/api/v1/jobs/{job_id}").json()
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {"done": 2, "total": 2}
+    assert job["result"]["created"] == 2
+    assert db.user.count_documents({"email": {"$in": ["jobone@example.com", "jobtwo@example.com"]}}) == 2
+
+    listed = client.get("/api/v1/jobs/", params={"type": "provision_users"}).json()
+    assert [item["id"] for item in listed["items"]] == [job_id]
+    assert listed["next"] is None
+
+
+def test_failed_job_is_retried_then_marked_failed(setup_db):
+    calls = []
+
+    @job_handler("flaky_test_job")
+    def flaky(params, progress):
+        calls.append(params)
+        if len(calls) < 2:
+            raise RuntimeError("temporary failure")
+        return {"ok": True}
+
+    @job_handler("broken_test_job")
+    def broken(params, progress):
+        raise RuntimeError("always fails")
+
+    try:
+        flaky_id = job_queue.enqueue("flaky_test_job", {"n": 1})
+        broken_id = job_queue.enqueue("broken_test_job", {}, max_attempts=2)
+        # Each pass claims every due job; retries are due again immediately with no backoff
+        job_queue.run_pending()
+
+        flaky_job = job_queue.get(flaky_id)
+        assert flaky_job["status"] == "succeeded"
+        assert flaky_job["attempts"] == 2
+        assert flaky_job["result"] == {"ok": True}
+
+        broken_job = job_queue.get(broken_id)
+        assert broken_job["status"] == "failed"
+        assert broken_job["attempts"] == 2
+        assert broken_job["error"] == "always fails"
+    finally:
+        JOB_HANDLERS.pop("flaky_test_job")
+        JOB_HANDLERS.pop("broken_test_job")
+
+
+def test_finished_at_is_taken_when_the_job_ends(setup_db):
+    @job_handler("slow_test_job")
+    def slow(params, progress):
+        time.sleep(0.2)
+        return {}
+
+    try:
+        job_id = job_queue.enqueue("slow_test_job", {})
+        job_queue.run(job_queue.claim())
+        job = job_queue.get(job_id)
+        assert job["finished_at"] - job["created_at"] >= timedelta(seconds=0.2)
+    finally:
+        JOB_HANDLERS.pop("slow_test_job")
+
+def test_stale_worker_cannot_overwrite_a_reclaimed_job(setup_db):
+    @job_handler("stalled_test_job")
+    def stalled(params, progress):
+        # While this attempt stalls, its lease lapses and another worker takes the job over
+        db.jobs.update_one({"_id": job_id}, {"$set": {"lease_until": datetime(2000, 1, 1)}})
+        reclaimed.append(job_queue.claim())
+        progress(1, 1)
+        return {"attempt": "stale"}
+
+    reclaimed = []
+    try:
+        job_id = job_queue.enqueue("stalled_test_job", {})
+        job_queue.run(job_queue.claim())
+
+        job = job_queue.get(job_id)
+        assert reclaimed[0]["_id"] == job_id
+        assert job["claim"] == reclaimed[0]["claim"]
+        assert job["status"] == "running"
+        assert job["progress"] == {"done": 0, "total": None}
+        assert "result" not in job
+    finally:
+        JOB_HANDLERS.pop("stalled_test_job")
+
+
+def test_unknown_job_is_not_found(setup_db):
+    assert client.get("/api/v1/jobs/not-an-id").status_code == 404
+    assert client.get("/api/v1/jobs/0123456789abcdef01234567").status_code == 404
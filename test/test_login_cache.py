@@ -0,0 +1,44 @@
+import time
+from utils.login_cache import VerificationCache
+
+
+def make_cache(ttl=60, max_entries=100):
+    return VerificationCache(ttl=ttl, max_entries=max_entries, secret=b"test-secret")
+
+
+def test_hit_after_add():
+    cache = make_cache()
+    cache.add(1, "ValidPassword123!", "$2b$12$hash")
+    assert cache.hit(1, "ValidPassword123!", "$2b$12$hash")
+    assert not cache.hit(1, "OtherPassword123!", "$2b$12$hash")
+    assert not cache.hit(1, "ValidPassword123!", "$2b$12$newhash")
+
+
+def test_disabled_when_ttl_is_zero():
+    cache = make_cache(ttl=0)
+    cache.add(1, "ValidPassword123!", "$2b$12$hash")
+    assert not cache.hit(1, "ValidPassword123!", "$2b$12$hash")
+
+
+def test_entries_expire():
+    cache = make_cache(ttl=0.01)
+    cache.add(1, "ValidPassword123!", "$2b$12$hash")
+    time.sleep(0.02)
+    assert not cache.hit(1, "ValidPassword123!", "$2b$12$hash")
+
+
+def test_invalidate_user():
+    cache = make_cache()
+    cache.add(1, "ValidPassword123!", "$2b$12$hash")
+    cache.add(2, "ValidPassword123!", "$2b$12$hash")
+    cache.invalidate(1)
+    assert not cache.hit(1, "ValidPassword123!", "$2b$12$hash")
+    assert cache.hit(2, "ValidPassword123!", "$2b$12$hash")
+
+
+def test_oldest_entries_evicted_when_full():
+    cache = make_cache(max_entries=2)
+    for user_id in (1, 2, 3):
+        cache.add(user_id, "ValidPassword123!", "$2b$12$hash")
+    assert not cache.hit(1, "ValidPassword123!", "$2b$12$hash")
+    assert cache.hit(3, "ValidPassword123!", "$2b$12$hash")
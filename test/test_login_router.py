@@ -1,21 +1,26 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app
-from config.db import conn
+from config.db import db
 from bcrypt import hashpw, gensalt
+from utils.hashing import hash_rounds, get_rounds
+from utils.rate_limit import login_limiter, MemoryStore
+from utils.login_cache import login_cache
+from routes import login_router
 
 client = TestClient(app)
 
 @pytest.fixture(scope="module")
 def setup_db():
-    conn.local.user.drop()
+    db.user.drop()
     yield
-    conn.local.user.drop()
+    db.user.drop()
 
 def create_user(email: str, password: str):
     hashed_password = hashpw(password.encode('utf-8'), gensalt()).decode('utf-8')
-    conn.local.user.insert_one({
+    db.user.insert_one({
         "email": email,
+        "email_normalized": email.lower(),
         "password": hashed_password,
         "role": "user",
         "id": 1
@@ -59,3 +64,62 @@ def test_login_non_existent_user(setup_db):
     )
     assert response.status_code == 404
     assert response.json() == {"detail": "User not found"}
+
+def test_login_round_trip_budget(setup_db, db_budget):
+    create_user("budget@example.com", "ValidPassword123!")
+
+    with db_budget("POST /api/v1/login/", 1):
+        response = client.post(
+            "/api/v1/login/",
+            json={
+                "email": "budget@example.com",
+                "password": "ValidPassword123!"
+            }
+        )
+    assert response.status_code == 200
+
+def test_login_rehashes_password_with_outdated_cost(setup_db):
+    db.user.delete_many({"email": "rehash@example.com"})
+    db.user.insert_one({
+        "email": "rehash@example.com",
+        "email_normalized": "rehash@example.com",
+        "password": hashpw("ValidPassword123!".encode('utf-8'), gensalt(4)).decode('utf-8'),
+        "role": "user",
+        "id": 2
+    })
+
+    response = client.post(
+        "/api/v1/login/",
+        json={
+            "email": "rehash@example.com",
+            "password": "ValidPassword123!"
+        }
+    )
+    assert response.status_code == 200
+    stored = db.user.find_one({"email": "rehash@example.com"})
+    assert hash_rounds(stored["password"]) == get_rounds()
+
+def test_login_rate_limited_after_repeated_failures(setup_db, monkeypatch):
+    monkeypatch.setattr(login_limiter, "store", MemoryStore())
+    monkeypatch.setattr(login_limiter, "limits", {"email": 2, "ip": 100})
+    create_user("limited@example.com", "ValidPassword123!")
+    credentials = {"email": "limited@example.com", "password": "WrongPassword123!"}
+
+    assert client.post("/api/v1/login/", json=credentials).status_code == 401
+    assert client.post("/api/v1/login/", json=credentials).status_code == 401
+
+    response = client.post("/api/v1/login/", json=credentials)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+def test_repeated_login_served_from_verification_cache(setup_db, monkeypatch):
+    monkeypatch.setattr(login_cache, "ttl", 60)
+    create_user("cached@example.com", "ValidPassword123!")
+    credentials = {"email": "cached@example.com", "password": "ValidPassword123!"}
+    assert client.post("/api/v1/login/", json=credentials).status_code == 200
+
+    async def fail_verify(password, hashed_password):
+        raise AssertionError("bcrypt verify should be skipped for a cached login")
+
+    monkeypatch.setattr(login_router, "verify_password_async", fail_verify)
+    assert client.post("/api/v1/login/", json=credentials).status_code == 200
@@ -1,7 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app, get_password_hash
-from config.db import conn
+from config.db import db
 from bson.objectid import ObjectId
 import bcrypt
 
@@ -9,9 +9,9 @@ client = TestClient(app)
 
 @pytest.fixture(autouse=True)
 def setup_db():
-    conn.local.user.delete_many({})
+    db.user.delete_many({})
     yield
-    conn.local.user.delete_many({})
+    db.user.delete_many({})
 
 
 def test_find_admin(setup_db):
@@ -46,7 +46,7 @@ def test_create_user():
     }
     response = client.post("/api/v1/user", json=user_data)  # Replace with the actual endpoint for user creation
     assert response.status_code == 201
-    created_user = conn.local.user.find_one({"email": "admin@gmail.com"})
+    created_user = db.user.find_one({"email": "admin@gmail.com"})
     assert created_user is not None
     assert created_user["name"] == "Admin"
  
@@ -57,3 +57,17 @@ def test_password_hashing():
     assert hashed_password != raw_password
     assert bcrypt.checkpw(raw_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+
+
+def test_lifespan_seeds_admin_once():
+    with TestClient(app):
+        pass
+    sequence = db.counters.find_one({"_id": "userid"})
+
+    # A second startup finds the admin and must not consume another id
+    with TestClient(app) as started_client:
+        response = started_client.get("/api/v1/metrics/startup")
+
+    assert db.user.count_documents({"email": "admin@gmail.com"}) == 1
+    assert db.counters.find_one({"_id": "userid"}) == sequence
+    assert set(response.json()) >= {"mongo_pool", "indexes", "validators", "admin_seed", "total"}
@@ -0,0 +1,11 @@
+from manage import parse_importtime
+
+
+def test_parse_importtime():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   bcrypt._bcrypt",
+        "import time:       300 |        420 | bcrypt",
+        "unrelated line",
+    ])
+    assert parse_importtime(output) == [("bcrypt._bcrypt", 120, 120), ("bcrypt", 300, 420)]
@@ -4,18 +4,19 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from main import app
-from config.db import conn
+from config.db import db
+from config import settings
 
 client = TestClient(app)
 
 @pytest.fixture(scope="module")
 def setup_db():
     # Ensure the member collection is empty before tests
-    conn.local.members.drop()
-    conn.local.counters.drop()  # Ensure counters collection is also empty for sequence values
+    db.members.drop()
+    db.counters.drop()  # Ensure counters collection is also empty for sequence values
     yield
-    conn.local.members.drop()
-    conn.local.counters.drop()
+    db.members.drop()
+    db.counters.drop()
 
 def test_create_member(setup_db):
     response = client.post(
@@ -199,3 +200,146 @@ def test_delete_member_not_found(setup_db):
     response = client.delete("/api/v1/member/9999")  # Non-existent member ID
     assert response.status_code == 404
     assert response.json() == {"detail": "Panel Member with id 9999 not found"}
+
+def test_member_routes_round_trip_budget(setup_db, db_budget):
+    member_data = {
+        "name": "Budget Member",
+        "email": "budgetmember@example.com",
+        "mobile_number": 1231231234,
+        "location": "Budget Location"
+    }
+    with db_budget("POST /api/v1/member/", 5):
+        create_response = client.post("/api/v1/member/", json=member_data)
+    assert create_response.status_code == 201
+    member_id = create_response.json()["id"]
+
+    with db_budget("GET /api/v1/member/", 2):
+        client.get("/api/v1/member/")
+
+    with db_budget("GET /api/v1/member/{id}", 1):
+        client.get(f"/api/v1/member/{member_id}")
+
+    with db_budget("PUT /api/v1/member/{id}", 4):
+        client.put(f"/api/v1/member/{member_id}", json={"name": "Budget Moved"})
+
+    with db_budget("DELETE /api/v1/member/{id}", 3):
+        client.delete(f"/api/v1/member/{member_id}")
+
+def test_update_member_email_taken_by_another_member(setup_db):
+    ids = []
+    for name, email in [("Taken Member", "taken.member@example.com"), ("Taker Member", "taker.member@example.com")]:
+        response = client.post("/api/v1/member/", json={
+            "name": name,
+            "email": email,
+            "mobile_number": 5554443334,
+            "location": "Nagpur"
+        })
+        ids.append(response.json()["id"])
+
+    response = client.put(f"/api/v1/member/{ids[1]}", json={"email": "TAKEN.member@example.com"})
+    assert response.status_code == 409
+    assert response.json() == {"detail": "Panel member with this email already exists"}
+
+def test_search_members(setup_db):
+    for name, email, location in [
+        ("Search One", "searchone@example.com", "Pune"),
+        ("Search Two", "searchtwo@example.com", "Delhi"),
+        ("Other Three", "otherthree@example.com", "Pune"),
+    ]:
+        client.post("/api/v1/member/", json={
+            "name": name,
+            "email": email,
+            "mobile_number": 5554443332,
+            "location": location
+        })
+
+    response = client.get("/api/v1/member/search", params={"name": "Search", "location": ["Pune", "Delhi"]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+    assert [item["email"] for item in data["items"]] == ["searchone@example.com", "searchtwo@example.com"]
+
+    response = client.get("/api/v1/member/search", params={"location": "Pune", "page": 2, "page_size": 1})
+    data = response.json()
+    assert data["total"] == 2
+    assert [item["email"] for item in data["items"]] == ["otherthree@example.com"]
+
+def test_search_total_is_capped(setup_db, monkeypatch):
+    for number in range(3):
+        client.post("/api/v1/member/", json={
+            "name": f"Capped {number}",
+            "email": f"capped{number}@example.com",
+            "mobile_number": 5554443333,
+            "location": "Surat"
+        })
+    monkeypatch.setattr(settings, "SEARCH_COUNT_LIMIT", 2)
+
+    data = client.get("/api/v1/member/search", params={"location": "Surat"}).json()
+    assert data["total"] == 2
+    assert data["total_capped"] is True
+    assert len(data["items"]) == 3
+
+def test_bulk_update_and_delete_members(setup_db):
+    ids = []
+    for name, email in [("Bulk One", "bulkone@example.com"), ("Bulk Two", "bulktwo@example.com")]:
+        response = client.post("/api/v1/member/", json={
+            "name": name,
+            "email": email,
+            "mobile_number": 5554443331,
+            "location": "Chennai"
+        })
+        ids.append(response.json()["id"])
+
+    response = client.patch("/api/v1/member/bulk", json={"filter": {"email": "bulk"}, "update": {"location": "Mumbai"}})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["matched"] == 2
+    assert data["modified"] == 2
+    assert [result["status"] for result in data["results"]] == ["updated", "updated"]
+    assert db.members.count_documents({"id": {"$in": ids}, "location": "Mumbai"}) == 2
+
+    # Applying the same patch again changes nothing
+    response = client.patch("/api/v1/member/bulk", json={"ids": ids, "update": {"location": "Mumbai"}})
+    assert [result["status"] for result in response.json()["results"]] == ["unchanged", "unchanged"]
+
+    response = client.request("DELETE", "/api/v1/member/bulk", json={"ids": [ids[0], ids[1], 999999]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["deleted"] == 2
+    assert data["results"] == [
+        {"id": ids[0], "status": "deleted"},
+        {"id": ids[1], "status": "deleted"},
+        {"id": 999999, "status": "not_found"},
+    ]
+    assert client.get(f"/api/v1/member/{ids[0]}").status_code == 404
+    assert db.members.count_documents({"id": {"$in": ids}, "deleted_at": {"$exists": True}}) == 2
+
+def test_bulk_requests_need_a_selection(setup_db):
+    response = client.patch("/api/v1/member/bulk", json={"update": {"location": "Mumbai"}})
+    assert response.status_code == 422
+
+    response = client.patch("/api/v1/member/bulk", json={"filter": {}, "update": {"location": "Mumbai"}})
+    assert response.status_code == 422
+
+    response = client.patch("/api/v1/member/bulk", json={"ids": [1], "update": {"email": "same@example.com"}})
+    assert response.status_code == 400
+
+def test_deleted_member_can_be_restored(setup_db):
+    response = client.post("/api/v1/member/", json={
+        "name": "Restored",
+        "email": "restored@example.com",
+        "mobile_number": 5554443338,
+        "location": "Pune"
+    })
+    member_id = response.json()["id"]
+
+    assert client.delete(f"/api/v1/member/{member_id}").status_code == 200
+    assert client.get(f"/api/v1/member/{member_id}").status_code == 404
+    assert client.get("/api/v1/member/search", params={"email": "restored@"}).json()["total"] == 0
+    assert client.delete(f"/api/v1/member/{member_id}").status_code == 404
+
+    response = client.post(f"/api/v1/member/{member_id}/restore")
+    assert response.status_code == 200
+    assert response.json()["email"] == "restored@example.com"
+    assert client.get(f"/api/v1/member/{member_id}").status_code == 200
+    assert client.post(f"/api/v1/member/{member_id}/restore").status_code == 404
@@ -1,17 +1,18 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app  # Ensure you import the FastAPI app correctly
-from config.db import conn
+from config.db import db
 
 client = TestClient(app)
 
 @pytest.fixture
 def setup_db():
-    user_collection = conn.local.user
+    user_collection = db.user
     user_collection.delete_many({})  # Clear the user collection
     # Insert a test user
     user_collection.insert_one({
         "email": "test@example.com",
+        "email_normalized": "test@example.com",
         "password": "OldHashedPassword123!"  # Assuming a pre-hashed password
     })
     yield
@@ -28,7 +29,7 @@ def test_reset_password_success(setup_db):
     assert response.json() == {"message": "Password reset successful"}
 
     # Verify password has been updated in the database
-    user_collection = conn.local.user
+    user_collection = db.user
     updated_user = user_collection.find_one({"email": "test@example.com"})
     assert updated_user is not None
     assert updated_user["password"] != "OldHashedPassword123!"  # Password should be changed
@@ -49,4 +50,11 @@ def test_reset_password_invalid_password(setup_db):
         json={"new_password": "short"}
     )
     assert response.status_code == 422
-    assert response.json() == {"message": "Password must be at least 8 characters long"}
\ No newline at end of file
+    assert response.json() == {"message": "Password must be at least 8 characters long"}
+def test_reset_password_round_trip_budget(setup_db, db_budget):
+    with db_budget("PUT /api/v1/password_reset/{email}", 2):
+        response = client.put(
+            "/api/v1/password_reset/test@example.com",
+            json={"new_password": "NewPassword123!"}
+        )
+    assert response.status_code == 200
@@ -0,0 +1,49 @@
+import pytest
+from utils.rate_limit import LoginRateLimiter, MemoryStore
+
+
+@pytest.fixture
+def limiter():
+    return LoginRateLimiter(MemoryStore(), window=60, limits={"email": 3, "ip": 10}, lockout=30, max_lockout=100)
+
+
+def test_allows_attempts_under_the_limit(limiter):
+    keys = {"email": "user@example.com", "ip": "10.0.0.1"}
+    for _ in range(2):
+        limiter.record_failure(keys, now=1000)
+    assert limiter.retry_after(keys, now=1001) == 0
+
+
+def test_locks_out_after_too_many_failures(limiter):
+    keys = {"email": "user@example.com", "ip": "10.0.0.1"}
+    for _ in range(3):
+        limiter.record_failure(keys, now=1000)
+    assert limiter.retry_after(keys, now=1001) == pytest.approx(29)
+    assert limiter.retry_after(keys, now=1031) == 0
+    assert limiter.stats()["lockouts"] == 1
+
+
+def test_lockout_backoff_doubles_and_is_capped(limiter):
+    keys = {"email": "user@example.com"}
+    now = 1000
+    for expected in (30, 60, 100, 100):
+        for _ in range(3):
+            limiter.record_failure(keys, now=now)
+        assert limiter.retry_after(keys, now=now) == pytest.approx(expected)
+        now += expected
+
+
+def test_window_slides(limiter):
+    keys = {"email": "user@example.com"}
+    limiter.record_failure(keys, now=1000)
+    limiter.record_failure(keys, now=1000)
+    limiter.record_failure(keys, now=1061)
+    assert limiter.store.count("email:user@example.com", 1061, 60) == 1
+
+
+def test_success_clears_email_key(limiter):
+    keys = {"email": "user@example.com", "ip": "10.0.0.1"}
+    limiter.record_failure(keys, now=1000)
+    limiter.record_success({"email": "user@example.com"})
+    assert limiter.store.count("email:user@example.com", 1000, 60) == 0
+    assert limiter.store.count("ip:10.0.0.1", 1000, 60) == 1
@@ -4,18 +4,18 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from main import app
-from config.db import conn
+from config.db import db
 
 client = TestClient(app)
 
 @pytest.fixture(scope="module")
 def setup_db():
     # Ensure the user collection is empty before tests
-    conn.local.user.drop()
-    conn.local.counters.drop()  # Ensure counters collection is also empty for sequence values
+    db.user.drop()
+    db.counters.drop()  # Ensure counters collection is also empty for sequence values
     yield
-    conn.local.user.drop()
-    conn.local.counters.drop()
+    db.user.drop()
+    db.counters.drop()
 
 def test_create_user(setup_db):
     response = client.post(
@@ -201,6 +201,26 @@ def test_update_user_no_changes(setup_db):
     assert update_response.json()["detail"] == "Failed to update user"
 
 
+def test_update_user_email_taken_by_another_account(setup_db):
+    ids = []
+    for name, email in [("Alice Taken", "alice.taken@example.com"), ("Bob Taker", "bob.taker@example.com")]:
+        response = client.post("/api/v1/user/", json={
+            "name": name,
+            "email": email,
+            "mobile_number": 2233445567,
+            "location": "Pune",
+            "password": "Password123!"
+        })
+        ids.append(response.json()["id"])
+
+    response = client.put(f"/api/v1/user/{ids[1]}", json={"email": "Alice.Taken@example.com"})
+    assert response.status_code == 409
+    assert response.json() == {"detail": "User with this email already exists"}
+
+    # A user may still change the case of their own address
+    response = client.put(f"/api/v1/user/{ids[0]}", json={"email": "Alice.Taken@Example.com"})
+    assert response.status_code == 200
+
 def test_get_user_not_found(setup_db):
     # Attempt to get a non-existent user
     response = client.get("/api/v1/user/9999")  # Non-existent user ID
@@ -212,3 +232,93 @@ def test_delete_user_not_found(setup_db):
     response = client.delete("/api/v1/user/9999")  # Non-existent user ID
     assert response.status_code == 404
     assert response.json() == {"detail": "User with id 9999 not found"}
+
+def test_user_routes_round_trip_budget(setup_db, db_budget):
+    user_data = {
+        "name": "Budget User",
+        "email": "budgetuser@example.com",
+        "mobile_number": 1231231234,
+        "location": "Budget Location",
+        "password": "Password123!"
+    }
+    with db_budget("POST /api/v1/user/", 5):
+        create_response = client.post("/api/v1/user/", json=user_data)
+    assert create_response.status_code == 201
+    user_id = create_response.json()["id"]
+
+    with db_budget("GET /api/v1/user/", 2):
+        client.get("/api/v1/user/")
+
+    with db_budget("GET /api/v1/user/{id}", 1):
+        client.get(f"/api/v1/user/{user_id}")
+
+    with db_budget("PUT /api/v1/user/{id}", 4):
+        client.put(f"/api/v1/user/{user_id}", json={"name": "Budget Moved"})
+
+    with db_budget("DELETE /api/v1/user/{id}", 3):
+        client.delete(f"/api/v1/user/{user_id}")
+
+def test_find_all_users_etag(setup_db):
+    client.post("/api/v1/user/", json={
+        "name": "Etag User",
+        "email": "etaguser@example.com",
+        "mobile_number": 4564564567,
+        "location": "Etag Location",
+        "password": "Password123!"
+    })
+    response = client.get("/api/v1/user/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    # Unchanged listing is answered without a body
+    not_modified = client.get("/api/v1/user/", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    # Any write invalidates the cached listing
+    user_id = next(u["id"] for u in response.json() if u["email"] == "etaguser@example.com")
+    client.put(f"/api/v1/user/{user_id}", json={"name": "Etag Renamed"})
+    refreshed = client.get("/api/v1/user/", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    assert any(u["name"] == "Etag Renamed" for u in refreshed.json())
+
+def test_search_users_by_email_prefix(setup_db):
+    client.post("/api/v1/user/", json={
+        "name": "Prefix User",
+        "email": "prefix.user@example.com",
+        "mobile_number": 5554443332,
+        "location": "Chennai",
+        "password": "Password123!"
+    })
+
+    response = client.get("/api/v1/user/search", params={"email": "prefix.", "mobile_number": 5554443332})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"][0]["email"] == "prefix.user@example.com"
+
+    # Regex metacharacters in the prefix are matched literally
+    response = client.get("/api/v1/user/search", params={"email": "prefix.*"})
+    assert response.json()["total"] == 0
+
+def test_bulk_update_users_reports_each_id(setup_db):
+    response = client.post("/api/v1/user/", json={
+        "name": "Bulk User",
+        "email": "bulkuser@example.com",
+        "mobile_number": 5554443330,
+        "location": "Kochi",
+        "password": "Password123!"
+    })
+    user_id = response.json()["id"]
+
+    response = client.patch("/api/v1/user/bulk", json={"ids": [user_id, 999999], "update": {"location": "Goa"}})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["matched"] == 1
+    assert data["results"] == [{"id": user_id, "status": "updated"}, {"id": 999999, "status": "not_found"}]
+    assert client.get(f"/api/v1/user/{user_id}").json()["location"] == "Goa"
+
+    # Each patch is validated once with the same rules as a single update
+    response = client.patch("/api/v1/user/bulk", json={"ids": [user_id], "update": {"name": "lowercase"}})
+    assert response.status_code == 422
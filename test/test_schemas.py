@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+from schemas.user import userJson, usersJson
+from schemas.members import memberJson
+
+
+def test_user_json_never_includes_secrets():
+    body = json.loads(userJson({
+        "id": 1, "name": "Secret", "email": "secret@example.com",
+        "password": "$2b$12$hash", "whatsapp_api_token": "EAAG-token"
+    }))
+    assert "password" not in body
+    assert "whatsapp_api_token" not in body
+    assert body["name"] == "Secret"
+
+
+def test_older_documents_serialize_with_defaults():
+    # Documents missing fields used to raise KeyError
+    body = json.loads(usersJson([{"id": 7, "email": "old@example.com"}]))
+    assert body == [{
+        "id": 7,
+        "name": None,
+        "email": "old@example.com",
+        "mobile_number": None,
+        "location": None,
+        "role": None,
+        "whatsapp_cloud_number_id": None,
+        "last_login": None,
+        "login_count": 0,
+    }]
+    assert json.loads(memberJson({"id": 8})) == {"id": 8, "name": None, "email": None, "mobile_number": None, "location": None}
+
+
+def test_last_login_is_reported_in_utc():
+    body = json.loads(userJson({"id": 1, "last_login": datetime(2024, 1, 1, 9, 30)}))
+    assert body["last_login"] == "2024-01-01T09:30:00Z"
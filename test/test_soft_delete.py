@@ -0,0 +1,38 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from config import settings
+from config.db import db
+from utils.soft_delete import purge_expired
+
+
+@pytest.fixture
+def setup_db():
+    for name in ("members", "members_archive", "user", "user_archive"):
+        db[name].drop()
+    yield
+    for name in ("members", "members_archive", "user", "user_archive"):
+        db[name].drop()
+
+
+def test_purge_archives_expired_tombstones_in_batches(setup_db):
+    now = datetime.now(timezone.utc)
+    expired = now - timedelta(days=settings.SOFT_DELETE_RETENTION_DAYS + 1)
+    db.members.insert_many([
+        {"id": 1, "email": "old1@example.com", "deleted_at": expired},
+        {"id": 2, "email": "old2@example.com", "deleted_at": expired},
+        {"id": 3, "email": "old3@example.com", "deleted_at": expired},
+        {"id": 4, "email": "recent@example.com", "deleted_at": now},
+        {"id": 5, "email": "live@example.com"},
+    ])
+    db.user.insert_one({"id": 6, "email": "olduser@example.com", "password": "hash", "deleted_at": expired})
+
+    assert purge_expired(now=now, batch_size=2) == 4
+    assert sorted(document["id"] for document in db.members.find()) == [4, 5]
+    assert sorted(document["id"] for document in db.members_archive.find()) == [1, 2, 3]
+    archived_user = db.user_archive.find_one({"id": 6})
+    assert "password" not in archived_user
+    assert "archived_at" in archived_user
+    assert db.user.count_documents({}) == 0
+
+    # Nothing left to purge
+    assert purge_expired(now=now, batch_size=2) == 0
@@ -0,0 +1,53 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from config.db import db
+
+client = TestClient(app)
+
+@pytest.fixture
+def setup_db():
+    db.members.drop()
+    db.counters.drop()
+    db.stats.drop()
+    yield
+    db.members.drop()
+    db.counters.drop()
+    db.stats.drop()
+
+def create_member(name, email, location):
+    response = client.post("/api/v1/member/", json={
+        "name": name,
+        "email": email,
+        "mobile_number": 1234567890,
+        "location": location
+    })
+    return response.json()["id"]
+
+def test_stats_follow_member_writes(setup_db):
+    first = create_member("Stats One", "statsone@example.com", "Pune")
+    create_member("Stats Two", "statstwo@example.com", "Pune")
+
+    stats = client.get("/api/v1/stats/").json()["members"]
+    assert stats["total"] == 2
+    assert stats["by_location"] == {"Pune": 2}
+
+    client.put(f"/api/v1/member/{first}", json={"location": "Delhi"})
+    stats = client.get("/api/v1/stats/").json()["members"]
+    assert stats["by_location"] == {"Pune": 1, "Delhi": 1}
+
+    client.delete(f"/api/v1/member/{first}")
+    stats = client.get("/api/v1/stats/").json()["members"]
+    assert stats["total"] == 1
+    assert stats["by_location"] == {"Pune": 1}
+
+def test_reconcile_corrects_drift(setup_db):
+    create_member("Stats One", "statsone@example.com", "Pune")
+    # Written behind the API's back, so the counters don't know about it
+    db.members.insert_one({"id": 99, "name": "Direct", "email": "direct@example.com", "mobile_number": 1234567890, "location": "Goa"})
+
+    response = client.post("/api/v1/stats/reconcile")
+    assert response.status_code == 200
+    stats = response.json()["members"]
+    assert stats["total"] == 2
+    assert stats["by_location"] == {"Pune": 1, "Goa": 1}
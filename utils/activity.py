@@ -0,0 +1,93 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from config import settings
+from config.db import db
+from utils.background import PeriodicTask, register
+from utils.list_cache import list_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityBuffer:
+    # Write-behind buffer for login activity. Repeated logins by the same user between flushes
+    # collapse into one entry, and each flush is a single unordered bulk_write. $max and $inc
+    # commute, so workers flushing their own buffers in any order still converge.
+    def __init__(self, collection_name: str = "user", max_entries: int = None):
+        self.collection_name = collection_name
+        self.max_entries = settings.ACTIVITY_BUFFER_MAX_ENTRIES if max_entries is None else max_entries
+        self.flush_task = None
+        self._pending = {}  # user id -> [last login, login count]
+        self._mutex = threading.Lock()
+        self.flushed = 0
+        self.dropped = 0
+
+    def record(self, user_id: int, when: datetime = None):
+        when = when or datetime.now(timezone.utc)
+        with self._mutex:
+            entry = self._pending.get(user_id)
+            if entry is not None:
+                entry[0] = max(entry[0], when)
+                entry[1] += 1
+                return
+            if len(self._pending) >= self.max_entries:
+                # Never grow without bound; losing activity beats slowing down logins
+                self.dropped += 1
+                full = True
+            else:
+                self._pending[user_id] = [when, 1]
+                full = len(self._pending) >= self.max_entries
+        if full and self.flush_task is not None:
+            self.flush_task.wake()
+
+    def flush(self):
+        with self._mutex:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        entries = list(pending.items())
+        operations = [
+            UpdateOne({"id": user_id}, {"$max": {"last_login": when}, "$inc": {"login_count": count}})
+            for user_id, (when, count) in entries
+        ]
+        try:
+            db[self.collection_name].bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # The other updates were applied; requeueing them would $inc their counts twice
+            failed = dict(entries[error["index"]] for error in e.details["writeErrors"])
+            logger.error("flushing login activity failed for %d of %d entries, keeping them for the next flush",
+                         len(failed), len(entries))
+            self._restore(failed)
+            self.flushed += len(entries) - len(failed)
+            list_cache.bump(self.collection_name)
+            return
+        except PyMongoError:
+            logger.exception("flushing login activity failed, keeping %d entries for the next flush", len(pending))
+            self._restore(pending)
+            return
+        self.flushed += len(pending)
+        list_cache.bump(self.collection_name)
+
+    def _restore(self, pending: dict):
+        with self._mutex:
+            for user_id, (when, count) in pending.items():
+                entry = self._pending.get(user_id)
+                if entry is not None:
+                    entry[0] = max(entry[0], when)
+                    entry[1] += count
+                elif len(self._pending) < self.max_entries:
+                    self._pending[user_id] = [when, count]
+                else:
+                    self.dropped += 1
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "flushed": self.flushed, "dropped": self.dropped}
+
+
+activity_buffer = ActivityBuffer()
+# Flushed once more on shutdown so buffered logins are not lost
+activity_buffer.flush_task = register(
+    PeriodicTask("activity-flush", settings.ACTIVITY_FLUSH_INTERVAL_SECONDS, activity_buffer.flush, run_on_stop=True)
+)
@@ -0,0 +1,117 @@
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from pymongo.errors import PyMongoError
+from config import settings
+from config.db import db
+from utils.background import PeriodicTask, register
+
+logger = logging.getLogger(__name__)
+
+
+# Recorded as changed, never with their value; the audit listing is readable by anyone
+SECRET_FIELDS = {"password", "whatsapp_api_token"}
+REDACTED = "[redacted]"
+
+
+class AuditLog:
+    # Append-only trail of mutations. Routes only enqueue; a background task inserts the
+    # queue in batches. When the queue is full the recording request writes a batch itself,
+    # which slows writers down under overload instead of losing events. If MongoDB cannot take
+    # them either, the queue still never grows past max_events: the oldest events are dropped
+    # and counted, as in ActivityBuffer.
+    def __init__(self, collection_name: str = "audit_log", max_events: int = None, batch_size: int = None):
+        self.collection_name = collection_name
+        self.max_events = settings.AUDIT_QUEUE_MAX_EVENTS if max_events is None else max_events
+        self.batch_size = settings.AUDIT_BATCH_SIZE if batch_size is None else batch_size
+        self.flush_task = None
+        self._queue = deque()
+        self._mutex = threading.Lock()
+        self.written = 0
+        self.inline_flushes = 0
+        self.dropped = 0
+
+    @property
+    def collection(self):
+        return db[self.collection_name]
+
+    def record(self, action: str, collection: str, target_ids: list, changes: dict = None):
+        event = {
+            "at": datetime.now(timezone.utc),
+            "action": action,
+            "collection": collection,
+            "target_ids": list(target_ids),
+        }
+        if changes:
+            event["changes"] = {field: REDACTED if field in SECRET_FIELDS else value for field, value in changes.items()}
+        with self._mutex:
+            self._queue.append(event)
+            self._trim()
+            queued = len(self._queue)
+        if queued >= self.max_events:
+            self.inline_flushes += 1
+            try:
+                self._write_batch()
+            except PyMongoError:
+                pass  # the mutation itself succeeded; its event stays queued for the next flush
+        elif queued >= self.batch_size and self.flush_task is not None:
+            self.flush_task.wake()
+
+    def _trim(self):
+        # Called with the mutex held
+        while len(self._queue) > self.max_events:
+            self._queue.popleft()
+            self.dropped += 1
+
+    def _write_batch(self) -> int:
+        with self._mutex:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        if not batch:
+            return 0
+        try:
+            self.collection.insert_many(batch, ordered=False)
+        except PyMongoError:
+            logger.exception("writing %d audit events failed, requeueing them", len(batch))
+            with self._mutex:
+                self._queue.extendleft(reversed(batch))
+                self._trim()
+            raise
+        self.written += len(batch)
+        return len(batch)
+
+    def flush(self):
+        try:
+            while self._write_batch():
+                pass
+        except PyMongoError:
+            pass  # already logged; the events are retried on the next flush
+
+    def ensure_collection(self):
+        if settings.AUDIT_CAPPED_SIZE_BYTES > 0:
+            if self.collection_name not in db.list_collection_names(filter={"name": self.collection_name}):
+                db.create_collection(self.collection_name, capped=True, size=settings.AUDIT_CAPPED_SIZE_BYTES)
+        elif settings.AUDIT_RETENTION_DAYS > 0:
+            self.collection.create_index(
+                [("at", 1)], expireAfterSeconds=int(settings.AUDIT_RETENTION_DAYS * 86400), name="at_ttl"
+            )
+        # Newest first, overall, per document and per action; ending in (at, _id) lets the
+        # listing's keyset pages come straight off the index
+        self.collection.create_index([("at", -1), ("_id", -1)])
+        self.collection.create_index([("collection", 1), ("target_ids", 1), ("at", -1), ("_id", -1)])
+        self.collection.create_index([("action", 1), ("at", -1), ("_id", -1)])
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "written": self.written,
+            "inline_flushes": self.inline_flushes,
+            "dropped": self.dropped,
+        }
+
+
+audit_log = AuditLog()
+# Flushed once more on shutdown so queued events are not lost
+audit_log.flush_task = register(
+    PeriodicTask("audit-flush", settings.AUDIT_FLUSH_INTERVAL_SECONDS, audit_log.flush, run_on_stop=True)
+)
@@ -0,0 +1,68 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    # Runs fn every interval seconds on a daemon thread. pymongo is synchronous, so background
+    # database work runs here rather than on the event loop.
+    def __init__(self, name: str, interval: float, fn, run_on_stop: bool = False):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.run_on_stop = run_on_stop
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        # Runs the task now instead of waiting for the rest of the interval
+        self._wake.set()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.run_on_stop:
+            self._run_once()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self._run_once()
+
+    def _run_once(self):
+        try:
+            self.fn()
+        except Exception:
+            logger.exception("background task %s failed", self.name)
+
+
+_tasks = []
+
+
+def register(task: PeriodicTask) -> PeriodicTask:
+    _tasks.append(task)
+    return task
+
+
+def start_background_tasks():
+    for task in _tasks:
+        task.start()
+
+
+def stop_background_tasks(timeout: float = 10):
+    for task in reversed(_tasks):
+        task.stop(timeout)
@@ -0,0 +1,89 @@
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# File layout: magic, bit count (uint64), hash count (uint32), padding, then the bit array
+MAGIC = b"BLOOMPW1"
+HEADER = struct.Struct("<8sQI4x")
+
+
+def _positions(password: str, bits: int, hashes: int):
+    # Double hashing: two 64-bit halves of one digest stand in for k independent hashes
+    digest = hashlib.blake2b(password.encode("utf-8"), digest_size=16).digest()
+    first, second = struct.unpack("<QQ", digest)
+    second |= 1
+    for i in range(hashes):
+        yield (first + i * second) % bits
+
+
+class BloomFilter:
+    # Read-only view over a filter file. The file is memory-mapped, so every worker process
+    # shares the same pages in the OS cache instead of loading its own copy.
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bits, self.hashes = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or len(self._map) < HEADER.size + math.ceil(self.bits / 8):
+            self._map.close()
+            raise ValueError(f"{path} is not a breached password filter")
+
+    def __contains__(self, password: str) -> bool:
+        return all(
+            self._map[HEADER.size + position // 8] & (1 << (position % 8))
+            for position in _positions(password, self.bits, self.hashes)
+        )
+
+    def close(self):
+        self._map.close()
+
+
+def build_filter(source: str, output: str, false_positive_rate: float = 0.001) -> dict:
+    # Two passes over the list (count, then set bits) so the source never has to fit in memory
+    with open(source, encoding="utf-8", errors="ignore") as file:
+        count = sum(1 for line in file if line.rstrip("\r\n"))
+    count = max(count, 1)
+    bits = math.ceil(-count * math.log(false_positive_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / count * math.log(2)))
+    array = bytearray(math.ceil(bits / 8))
+    with open(source, encoding="utf-8", errors="ignore") as file:
+        for line in file:
+            password = line.rstrip("\r\n")
+            if password:
+                for position in _positions(password, bits, hashes):
+                    array[position // 8] |= 1 << (position % 8)
+    # Written next to the target and renamed, so running workers never map a half-written file
+    temporary = f"{output}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(MAGIC, bits, hashes))
+        file.write(array)
+    os.replace(temporary, output)
+    return {"passwords": count, "bits": bits, "hashes": hashes, "bytes": HEADER.size + len(array)}
+
+
+_filter = None
+_loaded = False
+_mutex = threading.Lock()
+
+
+def load_filter():
+    # Opened once per process, at startup; no filter configured means no check
+    global _filter, _loaded
+    with _mutex:
+        if not _loaded:
+            _loaded = True
+            if settings.BREACHED_PASSWORD_FILTER:
+                _filter = BloomFilter(settings.BREACHED_PASSWORD_FILTER)
+                logger.info("breached password filter loaded (%d bits, %d hashes)", _filter.bits, _filter.hashes)
+    return _filter
+
+
+def is_breached(password: str) -> bool:
+    bloom = _filter if _loaded else load_filter()
+    return bloom is not None and password in bloom
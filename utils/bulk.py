@@ -0,0 +1,116 @@
+from fastapi import HTTPException, status
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from config import settings
+from config.db import db
+from utils import stats
+from utils.list_cache import list_cache
+from utils.audit import audit_log
+from utils.search import build_search_filter
+from utils.soft_delete import ACTIVE
+
+
+def _too_many():
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"A bulk request may select at most {settings.BULK_MAX_DOCUMENTS} documents"
+    )
+
+
+def _find_targets(collection: str, selection, fields) -> tuple:
+    # Returns the requested ids in order and the matching documents by id, in one query
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in fields}}
+    if selection.ids is not None:
+        ids = list(dict.fromkeys(selection.ids))
+        if len(ids) > settings.BULK_MAX_DOCUMENTS:
+            raise _too_many()
+        query = {"id": {"$in": ids}, **ACTIVE}
+    else:
+        criteria = selection.filter
+        query = build_search_filter(criteria.name, criteria.email, criteria.location, criteria.mobile_number)
+    documents = list(db[collection].find(query, projection).sort("id", 1).limit(settings.BULK_MAX_DOCUMENTS + 1))
+    if len(documents) > settings.BULK_MAX_DOCUMENTS:
+        raise _too_many()
+    if selection.ids is None:
+        ids = [document["id"] for document in documents]
+    return ids, {document["id"]: document for document in documents}
+
+
+def _write(collection: str, operations: list) -> tuple:
+    # operations is a list of (id, operation); returns the bulk result and error messages by id
+    if not operations:
+        return {"nModified": 0}, {}
+    try:
+        result = db[collection].bulk_write([operation for _, operation in operations], ordered=False)
+        return result.bulk_api_result, {}
+    except BulkWriteError as e:
+        errors = {operations[error["index"]][0]: error["errmsg"] for error in e.details["writeErrors"]}
+        return e.details, errors
+
+
+def bulk_update(collection: str, selection, changes: dict) -> dict:
+    if not changes:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update")
+    if "email" in changes:
+        # Emails are unique, so the same value can never apply to more than one document
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="email cannot be changed in bulk")
+
+    ids, found = _find_targets(collection, selection, set(changes) | set(stats.DIMENSIONS[collection]))
+    outcomes = {}
+    operations = []
+    for id in ids:
+        document = found.get(id)
+        if document is None:
+            outcomes[id] = {"status": "not_found"}
+        elif all(document.get(field) == value for field, value in changes.items()):
+            outcomes[id] = {"status": "unchanged"}
+        else:
+            operations.append((id, UpdateOne({"id": id, **ACTIVE}, {"$set": changes})))
+
+    result, errors = _write(collection, operations)
+    updated = []
+    for id, _ in operations:
+        if id in errors:
+            outcomes[id] = {"status": "failed", "detail": errors[id]}
+        else:
+            outcomes[id] = {"status": "updated"}
+            updated.append(found[id])
+    if updated:
+        stats.record_updates(collection, updated, changes)
+        list_cache.bump(collection)
+        audit_log.record("bulk_update", collection, [document["id"] for document in updated], changes)
+    return {
+        "matched": len(found),
+        "modified": result["nModified"],
+        "results": [{"id": id, **outcomes[id]} for id in ids],
+    }
+
+
+def bulk_delete(collection: str, selection) -> dict:
+    ids, found = _find_targets(collection, selection, stats.DIMENSIONS[collection])
+    # Soft delete, like the single delete routes
+    deleted_at = {"$set": {"deleted_at": datetime.now(timezone.utc)}}
+    operations = [(id, UpdateOne({"id": id, **ACTIVE}, deleted_at)) for id in ids if id in found]
+
+    result, errors = _write(collection, operations)
+    outcomes = {id: {"status": "not_found"} for id in ids}
+    deleted = []
+    for id, _ in operations:
+        if id in errors:
+            outcomes[id] = {"status": "failed", "detail": errors[id]}
+        else:
+            outcomes[id] = {"status": "deleted"}
+            deleted.append(found[id])
+    if deleted:
+        stats.record_deletes(collection, deleted)
+        list_cache.bump(collection)
+        audit_log.record("bulk_delete", collection, [document["id"] for document in deleted])
+        if result["nModified"] != len(deleted):
+            # Something else deleted some of them first, so the counters were decremented twice
+            stats.request_reconcile()
+    return {
+        "matched": len(found),
+        "deleted": result["nModified"],
+        "results": [{"id": id, **outcomes[id]} for id in ids],
+    }
@@ -0,0 +1,79 @@
+import logging
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from config.db import db
+from utils import stats
+from utils.audit import audit_log
+from utils.list_cache import list_cache
+from utils.soft_delete import ACTIVE
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = ("user", "members")
+# Partial, so documents written before the field existed do not collide on a missing value
+NORMALIZED_INDEX_OPTIONS = {"unique": True, "partialFilterExpression": {"email_normalized": {"$exists": True}}}
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def email_query(email: str) -> dict:
+    # Every lookup by email goes through the indexed normalized field, so case never matters
+    return {"email_normalized": normalize_email(email)}
+
+
+def migrate_emails(batch_size: int = 1000) -> dict:
+    # Backfills email_normalized in batches, oldest documents first. A document whose normalized
+    # email is already taken is a duplicate: it is soft deleted with duplicate_of pointing at
+    # the account that keeps the address, so nothing is lost and it can be inspected later.
+    # Live documents go before tombstones, so a deleted account never takes the address from
+    # a live one; a tombstone that clashes only gets duplicate_of.
+    summary = {}
+    for collection in COLLECTIONS:
+        db[collection].create_index([("email_normalized", 1)], **NORMALIZED_INDEX_OPTIONS)
+        pending = {"email_normalized": {"$exists": False}, "duplicate_of": {"$exists": False}}
+        live_backfilled, live_duplicates = _backfill(collection, {**pending, **ACTIVE}, batch_size)
+        deleted_backfilled, deleted_duplicates = _backfill(collection, pending, batch_size)
+        backfilled = live_backfilled + deleted_backfilled
+        duplicates = live_duplicates + deleted_duplicates
+        if duplicates:
+            list_cache.bump(collection)
+        summary[collection] = {"backfilled": backfilled, "duplicates": duplicates}
+        logger.info("%s: backfilled %d emails, %d duplicates", collection, backfilled, duplicates)
+    return summary
+
+
+def _backfill(collection: str, pending: dict, batch_size: int):
+    backfilled = duplicates = 0
+    while True:
+        batch = list(db[collection].find(pending).sort("id", 1).limit(batch_size))
+        if not batch:
+            break
+        operations = [
+            UpdateOne({"_id": document["_id"]}, {"$set": {"email_normalized": normalize_email(document["email"])}})
+            for document in batch
+        ]
+        try:
+            db[collection].bulk_write(operations, ordered=False)
+            failed = []
+        except BulkWriteError as e:
+            failed = [batch[error["index"]] for error in e.details["writeErrors"] if error["code"] == 11000]
+            if len(failed) != len(e.details["writeErrors"]):
+                raise
+        for document in failed:
+            _mark_duplicate(collection, document)
+        backfilled += len(batch) - len(failed)
+        duplicates += len(failed)
+    return backfilled, duplicates
+
+
+def _mark_duplicate(collection: str, document: dict):
+    keeper = db[collection].find_one(email_query(document["email"]), {"id": 1})
+    changes = {"duplicate_of": keeper["id"] if keeper else None}
+    if document.get("deleted_at") is None:
+        changes["deleted_at"] = datetime.now(timezone.utc)
+        stats.record_delete(collection, document)
+        audit_log.record("dedupe", collection, [document["id"]], {"duplicate_of": changes["duplicate_of"]})
+    db[collection].update_one({"_id": document["_id"]}, {"$set": changes})
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bcrypt import hashpw, gensalt, checkpw
+from pymongo.errors import DuplicateKeyError
+from config import settings
+from config.db import db
+
+logger = logging.getLogger(__name__)
+
+_rounds = None
+_executor = None
+_pending = 0
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int = 4, max_rounds: int = 31) -> int:
+    # Time a hash at the lowest cost; each extra round doubles the work
+    sample = b"calibration-password"
+    elapsed_ms = min(_time_hash(sample, min_rounds) for _ in range(3))
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
+def _time_hash(password: bytes, rounds: int) -> float:
+    start = time.perf_counter()
+    hashpw(password, gensalt(rounds))
+    return (time.perf_counter() - start) * 1000
+
+
+def get_rounds() -> int:
+    global _rounds
+    if _rounds is None:
+        if settings.BCRYPT_TARGET_MS > 0:
+            _rounds = shared_calibrated_rounds(settings.BCRYPT_TARGET_MS)
+        else:
+            _rounds = settings.BCRYPT_ROUNDS
+    return _rounds
+
+
+def shared_calibrated_rounds(target_ms: float) -> int:
+    # The first worker to start calibrates and stores the cost; every other worker (and every
+    # later start with the same target) uses it. Workers calibrating on their own could land on
+    # either side of a cost boundary and keep rehashing each other's hashes.
+    key = {"_id": f"bcrypt_rounds:{target_ms:g}"}
+    stored = db.app_settings.find_one(key)
+    if stored is not None:
+        return stored["rounds"]
+    rounds = calibrate_rounds(target_ms, settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MAX_ROUNDS)
+    try:
+        db.app_settings.insert_one({**key, "rounds": rounds})
+        logger.info("bcrypt cost calibrated to %d rounds for a %.0f ms target", rounds, target_ms)
+        return rounds
+    except DuplicateKeyError:
+        # Another worker calibrated at the same time; use its result
+        return db.app_settings.find_one(key)["rounds"]
+
+
+def set_rounds(rounds: int):
+    global _rounds
+    _rounds = rounds
+
+
+def hash_password(password: str) -> str:
+    return hashpw(password.encode('utf-8'), gensalt(get_rounds())).decode('utf-8')
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def hash_rounds(hashed_password: str) -> int:
+    # bcrypt hashes look like $2b$12$<salt+digest>
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    # Only upgrades; a stronger stored hash is left alone rather than weakened
+    return hash_rounds(hashed_password) < get_rounds()
+
+
+# bcrypt releases the GIL, so hashing on a small thread pool keeps the event loop free
+# to serve cheap requests while logins and password changes are being hashed.
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=hash_pool_size(), thread_name_prefix="bcrypt")
+    return _executor
+
+
+def hash_pool_size() -> int:
+    return settings.HASH_WORKERS or os.cpu_count() or 1
+
+
+async def _run_in_hash_pool(fn, *args):
+    global _pending
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, password, hashed_password)
+
+
+def hash_pool_stats() -> dict:
+    workers = hash_pool_size()
+    return {"workers": workers, "in_flight": _pending, "queued": max(0, _pending - workers)}
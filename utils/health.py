@@ -0,0 +1,42 @@
+import asyncio
+import time
+from collections import deque
+
+SAMPLE_INTERVAL_SECONDS = 0.5
+
+
+class LoopLagMonitor:
+    # Measures how late the event loop wakes a sleeping task. Blocking work on the loop
+    # (synchronous queries, CPU-heavy code) shows up here before it shows up in latency.
+    def __init__(self, samples: int = 10):
+        self._samples = deque(maxlen=samples)
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(SAMPLE_INTERVAL_SECONDS)
+            self._samples.append(max(0.0, time.perf_counter() - started - SAMPLE_INTERVAL_SECONDS) * 1000)
+
+    def stats(self) -> dict:
+        # The worst recent sample, so one quiet tick does not hide a blocked loop
+        return {
+            "lag_ms": round(self._samples[-1], 2) if self._samples else 0.0,
+            "max_lag_ms": round(max(self._samples), 2) if self._samples else 0.0,
+        }
+
+
+loop_lag = LoopLagMonitor()
@@ -0,0 +1,124 @@
+import contextvars
+import threading
+import time
+import pymongo
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from config import settings
+from config.db import db
+
+
+class IdempotencyStore:
+    # Stored responses live in a TTL-indexed collection, fronted by a small in-process cache
+    def __init__(self, database, ttl: int, max_entries: int, timeout_ms: int = 2000, lease: float = 30):
+        self.database = database
+        self.ttl = ttl
+        self.lease = lease
+        self.timeout_ms = timeout_ms
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # key -> (expires_at, record)
+        self._mutex = threading.Lock()
+        self._indexes_ready = False
+
+    @property
+    def collection(self):
+        # Resolved on use so importing this module doesn't open a MongoDB client
+        return self.database.idempotency_keys
+
+    def ensure_indexes(self):
+        if not self._indexes_ready:
+            self.collection.create_index("created_at", expireAfterSeconds=self.ttl)
+            self._indexes_ready = True
+
+    def cached(self, key: str):
+        with self._mutex:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._cache[key]
+                return None
+            return entry[1]
+
+    def _remember(self, key: str, record: dict):
+        with self._mutex:
+            self._cache.pop(key, None)
+            while len(self._cache) >= self.max_entries:
+                self._cache.popitem(last=False)
+            self._cache[key] = (time.monotonic() + self.ttl, record)
+
+    def _outside_request_deadline(self, fn, *args):
+        # Runs in an empty context so the request's pymongo.timeout() (possibly already spent
+        # when the request was cancelled) does not apply; the bookkeeping gets its own deadline
+        def run():
+            with pymongo.timeout(self.timeout_ms / 1000):
+                return fn(*args)
+        return contextvars.Context().run(run)
+
+    def begin(self, key: str, fingerprint: str):
+        # Claims the key; returns None when claimed, otherwise the existing record
+        return self._outside_request_deadline(self._begin, key, fingerprint)
+
+    def _begin(self, key: str, fingerprint: str):
+        self.ensure_indexes()
+        now = datetime.now(timezone.utc)
+        try:
+            self.collection.insert_one({
+                "_id": key,
+                "fingerprint": fingerprint,
+                "completed": False,
+                "created_at": now,
+                "claimed_at": now,
+            })
+            return None
+        except DuplicateKeyError:
+            # A claim whose lease ran out belongs to an attempt that died without releasing it
+            # (crash, OOM kill), so take it over instead of answering "in progress" until the TTL
+            taken_over = self.collection.find_one_and_update(
+                {"_id": key, "completed": False, "claimed_at": {"$not": {"$gte": now - timedelta(seconds=self.lease)}}},
+                {"$set": {"fingerprint": fingerprint, "claimed_at": now}}
+            )
+            if taken_over is not None:
+                return None
+            record = self.collection.find_one({"_id": key})
+            if record is None:
+                # Expired between the insert and the lookup, try once more
+                return self._begin(key, fingerprint)
+            if record["completed"]:
+                self._remember(key, record)
+            return record
+
+    def complete(self, key: str, fingerprint: str, status: int, content_type: str, body: bytes):
+        self._outside_request_deadline(self._complete, key, fingerprint, status, content_type, body)
+
+    def _complete(self, key: str, fingerprint: str, status: int, content_type: str, body: bytes):
+        record = {
+            "_id": key,
+            "fingerprint": fingerprint,
+            "completed": True,
+            "status": status,
+            "content_type": content_type,
+            "body": body,
+        }
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {"completed": True, "status": status, "content_type": content_type, "body": body}}
+        )
+        self._remember(key, record)
+
+    def abandon(self, key: str):
+        # Lets a retry run the request again when the first attempt failed server-side
+        self._outside_request_deadline(self._abandon, key)
+
+    def _abandon(self, key: str):
+        self.collection.delete_one({"_id": key, "completed": False})
+
+
+idempotency_store = IdempotencyStore(
+    db,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_CACHE_MAX_ENTRIES,
+    timeout_ms=settings.IDEMPOTENCY_STORE_TIMEOUT_MS,
+    lease=settings.IDEMPOTENCY_CLAIM_LEASE_SECONDS,
+)
@@ -0,0 +1,168 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+from config import settings
+from config.db import db
+from utils.background import PeriodicTask, register
+
+logger = logging.getLogger(__name__)
+
+# 2024-01-01T00:00:00Z; 41 bits of milliseconds from here last until 2093
+EPOCH_MS = 1704067200000
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+def get_next_sequence_value(sequence_name):
+    seq = db.counters.find_one_and_update(
+        {"_id": sequence_name},
+        {"$inc": {"sequence_value": 1}},
+        upsert=True,
+        return_document=True
+    )
+    return seq["sequence_value"]
+
+
+class SnowflakeGenerator:
+    # timestamp (41 bits) | worker id (10 bits) | per-millisecond sequence (12 bits)
+    def __init__(self, worker_id: int, epoch_ms: int = EPOCH_MS):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"Worker id must be between 0 and {MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self.epoch_ms = epoch_ms
+        self._last_ms = -1
+        self._sequence = 0
+        self._mutex = threading.Lock()
+
+    def _now_ms(self) -> int:
+        return time.time_ns() // 1_000_000
+
+    def next_id(self) -> int:
+        with self._mutex:
+            now = self._now_ms()
+            if now < self._last_ms:
+                # Clock stepped backwards; wait rather than risk reusing ids
+                time.sleep((self._last_ms - now) / 1000)
+                now = max(self._now_ms(), self._last_ms)
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond
+                    while now <= self._last_ms:
+                        now = self._now_ms()
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return ((now - self.epoch_ms) << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+
+class WorkerIdLease:
+    # Leases a snowflake worker id from the worker_ids collection, one document per id, so no
+    # two live processes share one. A hashed host and pid would collide by chance with a few
+    # dozen processes. The lease is renewed in the background; an expired one can be taken over.
+    def __init__(self, collection_name: str = "worker_ids", lease_seconds: float = None):
+        self.collection_name = collection_name
+        self.lease_seconds = settings.ID_WORKER_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.worker_id = None
+        self._owner = None
+        self._valid_until = 0.0  # monotonic; past it another process may hold the id
+
+    @property
+    def collection(self):
+        return db[self.collection_name]
+
+    def acquire(self) -> int:
+        started = time.monotonic()
+        now = datetime.now(timezone.utc)
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        lease = {"owner": owner, "expires_at": now + timedelta(seconds=self.lease_seconds)}
+        slot = self.collection.find_one_and_update({"expires_at": {"$lt": now}}, {"$set": lease}, sort=[("expires_at", 1)])
+        worker_id = slot["_id"] if slot is not None else self._insert_free_slot(lease)
+        self.worker_id, self._owner = worker_id, owner
+        self._valid_until = started + self.lease_seconds
+        logger.info("leased snowflake worker id %d", worker_id)
+        return worker_id
+
+    def _insert_free_slot(self, lease: dict) -> int:
+        taken = {document["_id"] for document in self.collection.find({}, {"_id": 1})}
+        for candidate in range(MAX_WORKER_ID + 1):
+            if candidate in taken:
+                continue
+            try:
+                self.collection.insert_one({"_id": candidate, **lease})
+                return candidate
+            except DuplicateKeyError:
+                continue  # another process took it first
+        raise RuntimeError(f"All {MAX_WORKER_ID + 1} snowflake worker ids are leased")
+
+    def renew(self):
+        if self.worker_id is None:
+            return
+        started = time.monotonic()
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+        result = self.collection.update_one({"_id": self.worker_id, "owner": self._owner}, {"$set": {"expires_at": expires_at}})
+        if result.matched_count == 0:
+            # Taken over after we stalled past the lease; the next id leases a new worker id
+            logger.warning("lost the lease on snowflake worker id %d", self.worker_id)
+            self.reset()
+        else:
+            self._valid_until = started + self.lease_seconds
+
+    def valid(self) -> bool:
+        return self.worker_id is not None and time.monotonic() < self._valid_until
+
+    def reset(self):
+        self.worker_id = None
+        self._owner = None
+        self._valid_until = 0.0
+
+
+worker_id_lease = WorkerIdLease()
+worker_id_lease.renew_task = register(
+    PeriodicTask("worker-id-lease", worker_id_lease.lease_seconds / 3, worker_id_lease.renew)
+)
+
+
+def default_worker_id() -> int:
+    if settings.ID_WORKER_ID is not None:
+        return int(settings.ID_WORKER_ID)
+    return worker_id_lease.acquire()
+
+
+_generator = None
+_generator_mutex = threading.Lock()
+
+
+def _reset_generator():
+    global _generator
+    _generator = None
+    worker_id_lease.reset()
+
+
+# A forked worker must not share the parent's worker id and sequence
+os.register_at_fork(after_in_child=_reset_generator)
+
+
+def _snowflake_generator() -> SnowflakeGenerator:
+    global _generator
+    with _generator_mutex:
+        if _generator is None:
+            _generator = SnowflakeGenerator(default_worker_id())
+        elif settings.ID_WORKER_ID is None and not worker_id_lease.valid():
+            # The lease lapsed, so another process may own the id now. The generator keeps its
+            # clock state, so even getting the same id back cannot repeat an earlier id.
+            _generator.worker_id = worker_id_lease.acquire()
+        return _generator
+
+
+def next_id(sequence_name: str) -> int:
+    if settings.ID_STRATEGY == "snowflake":
+        return _snowflake_generator().next_id()
+    return get_next_sequence_value(sequence_name)
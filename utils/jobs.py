@@ -0,0 +1,160 @@
+import logging
+import os
+import socket
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+from pymongo import ReturnDocument
+from config import settings
+from config.db import db
+from utils.background import PeriodicTask, register
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+# job type -> fn(params, progress) returning a JSON-serialisable result.
+# Handlers may run more than once for the same job, so they must be safe to repeat.
+JOB_HANDLERS = {}
+
+
+def job_handler(job_type: str):
+    def decorator(fn):
+        JOB_HANDLERS[job_type] = fn
+        return fn
+    return decorator
+
+
+class JobQueue:
+    # Persistent queue in MongoDB. Any worker in any process claims jobs atomically with
+    # find_one_and_update, and holds them under a lease so a crashed worker's job is retried.
+    def __init__(self, collection_name: str = "jobs"):
+        self.collection_name = collection_name
+        self.workers = []
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def collection(self):
+        return db[self.collection_name]
+
+    def enqueue(self, job_type: str, params: dict, max_attempts: int = None):
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job type {job_type}")
+        now = datetime.now(timezone.utc)
+        job = {
+            "type": job_type,
+            "status": QUEUED,
+            "params": params,
+            "progress": {"done": 0, "total": None},
+            "attempts": 0,
+            "max_attempts": max_attempts or settings.JOB_MAX_ATTEMPTS,
+            "run_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        job_id = self.collection.insert_one(job).inserted_id
+        for worker in self.workers:
+            worker.wake()
+        return job_id
+
+    def get(self, job_id):
+        return self.collection.find_one({"_id": job_id})
+
+    def claim(self):
+        now = datetime.now(timezone.utc)
+        return self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "run_at": {"$lte": now}},
+                {"status": RUNNING, "lease_until": {"$lt": now}},
+            ]},
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "worker": self.worker_name,
+                    # Unique per claim, so a worker that lost its lease cannot write over the
+                    # attempt that took the job over (worker names are shared by threads)
+                    "claim": ObjectId(),
+                    "lease_until": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _claimed(self, job) -> dict:
+        return {"_id": job["_id"], "claim": job["claim"]}
+
+    def _finish(self, job, update: dict):
+        if self.collection.update_one(self._claimed(job), update).matched_count == 0:
+            logger.warning("job %s was reclaimed by another worker; dropping this attempt's outcome", job["_id"])
+
+    def _progress(self, job):
+        def progress(done: int, total: int = None):
+            now = datetime.now(timezone.utc)
+            changes = {
+                "progress.done": done,
+                "lease_until": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                "updated_at": now,
+            }
+            if total is not None:
+                changes["progress.total"] = total
+            self.collection.update_one(self._claimed(job), {"$set": changes})
+        return progress
+
+    def run(self, job):
+        if job["attempts"] > job["max_attempts"]:
+            now = datetime.now(timezone.utc)
+            # Reclaimed after its last attempt's worker went away
+            self._finish(job, {
+                "$set": {"status": FAILED, "error": "worker stopped before finishing", "finished_at": now, "updated_at": now},
+                "$unset": {"lease_until": ""}
+            })
+            return
+        try:
+            result = JOB_HANDLERS[job["type"]](job["params"], self._progress(job))
+        except Exception as e:
+            logger.exception("job %s (%s) failed on attempt %d", job["_id"], job["type"], job["attempts"])
+            # Taken after the handler, so the backoff starts when the attempt ended
+            now = datetime.now(timezone.utc)
+            changes = {"error": str(e), "updated_at": now}
+            if job["attempts"] < job["max_attempts"]:
+                # Exponential backoff between attempts
+                delay = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+                changes.update({"status": QUEUED, "run_at": now + timedelta(seconds=delay)})
+            else:
+                changes.update({"status": FAILED, "finished_at": now})
+            self._finish(job, {"$set": changes, "$unset": {"lease_until": ""}})
+            return
+        now = datetime.now(timezone.utc)
+        self._finish(job, {
+            "$set": {"status": SUCCEEDED, "result": result, "finished_at": now, "updated_at": now},
+            "$unset": {"lease_until": "", "error": ""}
+        })
+
+    def run_pending(self):
+        # Drains every job that is due, then waits for the next poll or enqueue
+        while True:
+            job = self.claim()
+            if job is None:
+                return
+            self.run(job)
+
+    def ensure_indexes(self):
+        self.collection.create_index([("status", 1), ("run_at", 1)])
+        self.collection.create_index([("status", 1), ("lease_until", 1)])
+        # Listing is newest first on (created_at, _id), optionally filtered by type or status
+        self.collection.create_index([("type", 1), ("created_at", -1), ("_id", -1)])
+        self.collection.create_index([("status", 1), ("created_at", -1), ("_id", -1)])
+        self.collection.create_index([("created_at", -1), ("_id", -1)])
+        # Finished jobs are kept for inspection, then expire
+        self.collection.create_index(
+            [("finished_at", 1)], expireAfterSeconds=int(settings.JOB_RESULT_TTL_DAYS * 86400), name="finished_at_ttl"
+        )
+
+
+job_queue = JobQueue()
+for number in range(settings.JOB_WORKERS):
+    job_queue.workers.append(register(
+        PeriodicTask(f"job-worker-{number}", settings.JOB_POLL_INTERVAL_SECONDS, job_queue.run_pending)
+    ))
@@ -0,0 +1,41 @@
+import threading
+from config.db import db
+
+
+class CachedList:
+    def __init__(self, version: int, body: bytes, etag: str):
+        self.version = version
+        self.body = body
+        self.etag = etag
+
+
+class ListCache:
+    # Encoded list responses keyed by a per-collection version that every write path bumps.
+    # Versions live in MongoDB so all workers agree on when their cached bytes went stale.
+    def __init__(self, database):
+        self.database = database
+        self._entries = {}
+        self._mutex = threading.Lock()
+
+    def bump(self, name: str):
+        self.database.collection_versions.update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+
+    def version(self, name: str) -> int:
+        # Read before the data so cached bytes are never older than the version they are stored under
+        document = self.database.collection_versions.find_one({"_id": name})
+        return document["version"] if document else 0
+
+    def get(self, name: str, version: int):
+        entry = self._entries.get(name)
+        return entry if entry is not None and entry.version == version else None
+
+    def put(self, name: str, version: int, body: bytes) -> CachedList:
+        entry = CachedList(version, body, f'"{name}-{version}"')
+        with self._mutex:
+            current = self._entries.get(name)
+            if current is None or current.version <= version:
+                self._entries[name] = entry
+        return entry
+
+
+list_cache = ListCache(db)
@@ -0,0 +1,72 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from config import settings
+
+
+class VerificationCache:
+    # Remembers (user id, password, stored hash) triples that recently passed bcrypt.
+    # The stored hash is part of the key, so a changed password never matches an old entry.
+    def __init__(self, ttl: float, max_entries: int, secret: bytes):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._secret = secret
+        self._entries = OrderedDict()  # key -> (expires_at, user_id)
+        self._keys_by_user = {}
+        self._mutex = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _key(self, user_id, password: str, hashed_password: str) -> bytes:
+        message = b"\0".join([str(user_id).encode('utf-8'), password.encode('utf-8'), hashed_password.encode('utf-8')])
+        return hmac.new(self._secret, message, hashlib.sha256).digest()
+
+    def hit(self, user_id, password: str, hashed_password: str) -> bool:
+        if not self.enabled:
+            return False
+        key = self._key(user_id, password, hashed_password)
+        with self._mutex:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return False
+            return True
+
+    def add(self, user_id, password: str, hashed_password: str):
+        if not self.enabled:
+            return
+        key = self._key(user_id, password, hashed_password)
+        with self._mutex:
+            self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + self.ttl, user_id)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+
+    def invalidate(self, user_id):
+        with self._mutex:
+            for key in self._keys_by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def _remove(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[1])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[1]]
+
+
+login_cache = VerificationCache(
+    ttl=settings.LOGIN_CACHE_TTL_SECONDS,
+    max_entries=settings.LOGIN_CACHE_MAX_ENTRIES,
+    secret=settings.LOGIN_CACHE_SECRET.encode('utf-8') or os.urandom(32),
+)
@@ -0,0 +1,26 @@
+import random
+import string
+
+
+def generate_password(length: int = 12) -> str:
+    if length < 8:
+        raise ValueError("Password length should be at least 8 characters.")
+    
+    # Ensure the password has at least one of each character type
+    characters = {
+        "uppercase": random.choice(string.ascii_uppercase),
+        "lowercase": random.choice(string.ascii_lowercase),
+        "digits": random.choice(string.digits),
+        "special": random.choice(string.punctuation)
+    }
+    
+    # Fill the rest of the password length with random choices from all character types
+    all_characters = string.ascii_letters + string.digits + string.punctuation
+    remaining_length = length - len(characters)
+    password = ''.join(random.choices(all_characters, k=remaining_length))
+    
+    # Combine and shuffle to ensure randomness
+    password_list = list(characters.values()) + list(password)
+    random.shuffle(password_list)
+    
+    return ''.join(password_list)
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import deque, Counter
+from datetime import datetime, timezone
+from config import settings
+
+
+class MemoryStore:
+    # Per-process store; each worker keeps its own windows
+    max_keys = 10000
+
+    def __init__(self):
+        self._attempts = {}
+        self._locks = {}
+        self._mutex = threading.Lock()
+
+    def count(self, key: str, now: float, window: float) -> int:
+        with self._mutex:
+            attempts = self._attempts.get(key)
+            if not attempts:
+                return 0
+            while attempts and attempts[0] <= now - window:
+                attempts.popleft()
+            if not attempts:
+                del self._attempts[key]
+            return len(attempts)
+
+    def add(self, key: str, now: float, window: float) -> int:
+        with self._mutex:
+            if len(self._attempts) >= self.max_keys:
+                self._prune(now, window)
+            attempts = self._attempts.setdefault(key, deque())
+            attempts.append(now)
+            while attempts[0] <= now - window:
+                attempts.popleft()
+            return len(attempts)
+
+    def _prune(self, now: float, window: float):
+        # Keeps memory bounded during a spray of attempts across many emails
+        for key in [key for key, attempts in self._attempts.items() if attempts[-1] <= now - window]:
+            del self._attempts[key]
+        for key in [key for key, (until, _) in self._locks.items() if until <= now]:
+            del self._locks[key]
+
+    def get_lock(self, key: str):
+        return self._locks.get(key, (0.0, 0))
+
+    def set_lock(self, key: str, until: float, strikes: int):
+        self._locks[key] = (until, strikes)
+
+    def reset(self, key: str):
+        with self._mutex:
+            self._attempts.pop(key, None)
+
+    def clear(self, key: str):
+        with self._mutex:
+            self._attempts.pop(key, None)
+            self._locks.pop(key, None)
+
+    def locked_keys(self, now: float) -> int:
+        return sum(1 for until, _ in list(self._locks.values()) if until > now)
+
+
+class MongoStore:
+    # Shared store so every worker sees the same windows; documents expire through TTL indexes
+    def __init__(self, database, lock_ttl: float):
+        self.database = database
+        self.lock_ttl = lock_ttl
+        self._indexes_ready = False
+
+    @property
+    def attempts(self):
+        return self.database.login_attempts
+
+    @property
+    def locks(self):
+        return self.database.login_lockouts
+
+    def ensure_indexes(self, window: float):
+        if not self._indexes_ready:
+            self.attempts.create_index([("key", 1), ("at", 1)])
+            self.attempts.create_index("at", expireAfterSeconds=int(window) + 1)
+            self.locks.create_index("expires_at", expireAfterSeconds=0)
+            self._indexes_ready = True
+
+    def count(self, key: str, now: float, window: float) -> int:
+        self.ensure_indexes(window)
+        return self.attempts.count_documents({"key": key, "at": {"$gt": _to_datetime(now - window)}})
+
+    def add(self, key: str, now: float, window: float) -> int:
+        self.ensure_indexes(window)
+        self.attempts.insert_one({"key": key, "at": _to_datetime(now)})
+        return self.count(key, now, window)
+
+    def get_lock(self, key: str):
+        lock = self.locks.find_one({"_id": key})
+        if not lock:
+            return (0.0, 0)
+        return (lock["until"], lock["strikes"])
+
+    def set_lock(self, key: str, until: float, strikes: int):
+        self.locks.update_one(
+            {"_id": key},
+            {"$set": {"until": until, "strikes": strikes, "expires_at": _to_datetime(until + self.lock_ttl)}},
+            upsert=True
+        )
+
+    def reset(self, key: str):
+        self.attempts.delete_many({"key": key})
+
+    def clear(self, key: str):
+        self.attempts.delete_many({"key": key})
+        self.locks.delete_one({"_id": key})
+
+    def locked_keys(self, now: float) -> int:
+        return self.locks.count_documents({"until": {"$gt": now}})
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+class LoginRateLimiter:
+    # Sliding window of failed attempts per key with exponential lockout backoff
+    def __init__(self, store, window: float, limits: dict, lockout: float, max_lockout: float):
+        self.store = store
+        self.window = window
+        self.limits = limits  # key kind ("email", "ip") -> allowed failures per window
+        self.lockout = lockout
+        self.max_lockout = max_lockout
+        self.counters = Counter()
+
+    def retry_after(self, keys: dict, now: float = None) -> float:
+        # Returns seconds to wait if any key is locked out or over its limit, else 0
+        now = time.time() if now is None else now
+        wait = 0.0
+        for kind, value in keys.items():
+            key = f"{kind}:{value}"
+            until, _ = self.store.get_lock(key)
+            if until > now:
+                wait = max(wait, until - now)
+            elif self.store.count(key, now, self.window) >= self.limits[kind]:
+                wait = max(wait, self.window)
+        self.counters["rejected" if wait else "allowed"] += 1
+        return wait
+
+    def record_failure(self, keys: dict, now: float = None):
+        now = time.time() if now is None else now
+        self.counters["failures"] += 1
+        for kind, value in keys.items():
+            key = f"{kind}:{value}"
+            if self.store.add(key, now, self.window) >= self.limits[kind]:
+                _, strikes = self.store.get_lock(key)
+                strikes += 1
+                duration = min(self.lockout * 2 ** (strikes - 1), self.max_lockout)
+                self.store.set_lock(key, now + duration, strikes)
+                self.store.reset(key)  # start a fresh window once the lockout ends
+                self.counters["lockouts"] += 1
+
+    def record_success(self, keys: dict):
+        for kind, value in keys.items():
+            self.store.clear(f"{kind}:{value}")
+
+    def stats(self) -> dict:
+        return {
+            **{name: self.counters[name] for name in ("allowed", "rejected", "failures", "lockouts")},
+            "locked_keys": self.store.locked_keys(time.time()),
+        }
+
+
+def _build_store():
+    if settings.LOGIN_RATE_LIMIT_STORE == "mongo":
+        from config.db import db
+        return MongoStore(db, settings.LOGIN_LOCKOUT_MAX_SECONDS)
+    return MemoryStore()
+
+
+login_limiter = LoginRateLimiter(
+    _build_store(),
+    window=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    limits={"email": settings.LOGIN_RATE_LIMIT_PER_EMAIL, "ip": settings.LOGIN_RATE_LIMIT_PER_IP},
+    lockout=settings.LOGIN_LOCKOUT_SECONDS,
+    max_lockout=settings.LOGIN_LOCKOUT_MAX_SECONDS,
+)
@@ -0,0 +1,83 @@
+import re
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+from config import settings
+from utils.soft_delete import ACTIVE
+from utils.emails import normalize_email
+
+MAX_PAGE_SIZE = 100
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def prefix_match(prefix: str) -> dict:
+    # An anchored, case-sensitive regex can be answered from the index range for the prefix
+    return {"$regex": "^" + re.escape(prefix)}
+
+
+def build_search_filter(name: str = None, email: str = None, locations: list = None, mobile_numbers: list = None) -> dict:
+    query = dict(ACTIVE)  # soft-deleted documents never match a search
+    if name:
+        query["name"] = prefix_match(name)
+    if email:
+        query["email_normalized"] = prefix_match(normalize_email(email))
+    if locations:
+        query["location"] = locations[0] if len(locations) == 1 else {"$in": locations}
+    if mobile_numbers:
+        query["mobile_number"] = mobile_numbers[0] if len(mobile_numbers) == 1 else {"$in": mobile_numbers}
+    return query
+
+
+def paginated_search(collection, query: dict, page: int, page_size: int, serializer, sort: dict = None) -> dict:
+    # A plain find lets an index on the sort key return the page already in order; inside a
+    # $facet the sort, skip and limit could not use any index and ran over every match
+    cursor = collection.find(query).sort(list((sort or {"id": 1}).items()))
+    items = cursor.skip((page - 1) * page_size).limit(page_size)
+    total, total_capped = count_matches(collection, query)
+    return {
+        "items": [serializer(item) for item in items],
+        "total": total,
+        "total_capped": total_capped,
+        "page": page,
+        "page_size": page_size,
+    }
+
+
+def count_matches(collection, query: dict) -> tuple:
+    # Counting stops at SEARCH_COUNT_LIMIT, so a broad search does not scan every document
+    # just to report its total; total_capped tells the client the real number is higher
+    limit = settings.SEARCH_COUNT_LIMIT
+    if limit <= 0:
+        return collection.count_documents(query), False
+    total = collection.count_documents(query, limit=limit)
+    return total, total >= limit
+
+
+def keyset_page(collection, query: dict, field: str, page_size: int, serializer, after: str = None) -> dict:
+    # Newest first on (field, _id). The cursor carries the last item's position, so every page is
+    # a range scan on the (field, _id) index however deep the client goes, with no skip or count
+    if after:
+        value, last_id = decode_cursor(after)
+        query = {"$and": [query, {"$or": [{field: {"$lt": value}}, {field: value, "_id": {"$lt": last_id}}]}]}
+    items = list(collection.find(query).sort([(field, -1), ("_id", -1)]).limit(page_size))
+    return {
+        "items": [serializer(item) for item in items],
+        "next": encode_cursor(items[-1][field], items[-1]["_id"]) if len(items) == page_size else None,
+        "page_size": page_size,
+    }
+
+
+def encode_cursor(value: datetime, last_id: ObjectId) -> str:
+    # MongoDB dates have millisecond precision, so whole milliseconds round-trip exactly
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return f"{(value - EPOCH) // timedelta(milliseconds=1)}-{last_id}"
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        milliseconds, last_id = cursor.split("-", 1)
+        return EPOCH + timedelta(milliseconds=int(milliseconds)), ObjectId(last_id)
+    except (ValueError, InvalidId):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
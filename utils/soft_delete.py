@@ -0,0 +1,79 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from pymongo import ReplaceOne, ReturnDocument
+from config import settings
+from config.db import db
+from utils.background import PeriodicTask, register
+
+logger = logging.getLogger(__name__)
+
+# Live documents have no deleted_at; every read of users or members includes ACTIVE
+ACTIVE = {"deleted_at": None}
+# Tombstones only. Also the partial filter of the purge index, so that index holds
+# nothing but tombstones and stays small however large the collection grows.
+DELETED = {"deleted_at": {"$exists": True}}
+COLLECTIONS = ("user", "members")
+
+
+def soft_delete(collection: str, id: int, projection: dict = None):
+    # Returns the document as it was before deletion, or None if there is no live document
+    return db[collection].find_one_and_update(
+        {"id": id, **ACTIVE},
+        {"$set": {"deleted_at": datetime.now(timezone.utc)}},
+        projection=projection
+    )
+
+
+def restore(collection: str, id: int):
+    # Duplicates set aside by `manage.py migrate-emails` have no email_normalized and stay deleted
+    return db[collection].find_one_and_update(
+        {"id": id, **DELETED, "email_normalized": {"$exists": True}},
+        {"$unset": {"deleted_at": ""}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def ensure_indexes():
+    for collection in COLLECTIONS:
+        db[collection].create_index([("deleted_at", 1)], partialFilterExpression=DELETED, name="deleted_at_tombstones")
+        db[f"{collection}_archive"].create_index([("id", 1)])
+
+
+def purge_expired(now: datetime = None, batch_size: int = None) -> int:
+    # Moves tombstones older than the retention period to the archive, one batch at a time
+    now = now or datetime.now(timezone.utc)
+    batch_size = batch_size or settings.SOFT_DELETE_PURGE_BATCH_SIZE
+    expired = {"deleted_at": {"$exists": True, "$lte": now - timedelta(days=settings.SOFT_DELETE_RETENTION_DAYS)}}
+    purged = 0
+    for collection in COLLECTIONS:
+        archive = db[f"{collection}_archive"]
+        while True:
+            batch = list(db[collection].find(expired).sort("deleted_at", 1).limit(batch_size))
+            if not batch:
+                break
+            # Upserts keep a rerun after a crash between archiving and deleting harmless.
+            # Archived accounts can never log in again, so their password hashes are not kept.
+            archive.bulk_write([
+                ReplaceOne(
+                    {"_id": document["_id"]},
+                    {**{key: value for key, value in document.items() if key != "password"}, "archived_at": now},
+                    upsert=True
+                )
+                for document in batch
+            ], ordered=False)
+            ids = [document["_id"] for document in batch]
+            result = db[collection].delete_many({"_id": {"$in": ids}, **DELETED})
+            if result.deleted_count < len(batch):
+                # Restored after being read; they are live again, so drop their archive copies
+                live = [document["_id"] for document in db[collection].find({"_id": {"$in": ids}}, {"_id": 1})]
+                archive.delete_many({"_id": {"$in": live}})
+            purged += result.deleted_count
+            if len(batch) < batch_size:
+                break
+    if purged:
+        logger.info("archived %d deleted documents", purged)
+    return purged
+
+
+if settings.SOFT_DELETE_PURGE_INTERVAL_SECONDS > 0:
+    register(PeriodicTask("soft-delete-purge", settings.SOFT_DELETE_PURGE_INTERVAL_SECONDS, purge_expired))
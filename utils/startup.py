@@ -0,0 +1,18 @@
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# phase name -> milliseconds taken by the last startup
+startup_timings = {}
+
+
+@contextmanager
+def startup_phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = round((time.perf_counter() - start) * 1000, 2)
+        logger.info("startup phase %s took %.2f ms", name, startup_timings[name])
@@ -0,0 +1,120 @@
+import logging
+from collections import Counter
+from pymongo import UpdateOne, ReplaceOne
+from config import settings
+from config.db import db, read_db
+from utils.background import PeriodicTask, register
+from utils.soft_delete import ACTIVE
+
+logger = logging.getLogger(__name__)
+
+# Collection -> fields counted per value, next to the collection total
+DIMENSIONS = {
+    "user": ("location", "role"),
+    "members": ("location",),
+}
+
+
+def _counter_id(collection: str, field: str, value) -> dict:
+    return {"collection": collection, "field": field, "value": value}
+
+
+def _deltas(collection: str, document: dict, sign: int) -> Counter:
+    deltas = Counter({("total", None): sign})
+    for field in DIMENSIONS[collection]:
+        deltas[(field, document.get(field))] += sign
+    return deltas
+
+
+def _apply(collection: str, deltas: Counter):
+    operations = [
+        UpdateOne({"_id": _counter_id(collection, field, value)}, {"$inc": {"count": delta}}, upsert=True)
+        for (field, value), delta in deltas.items() if delta
+    ]
+    if operations:
+        db.stats.bulk_write(operations, ordered=False)
+
+
+def record_insert(collection: str, document: dict):
+    _apply(collection, _deltas(collection, document, 1))
+
+
+def record_delete(collection: str, document: dict):
+    _apply(collection, _deltas(collection, document, -1))
+
+
+def record_deletes(collection: str, documents: list):
+    deltas = Counter()
+    for document in documents:
+        deltas.update(_deltas(collection, document, -1))
+    _apply(collection, deltas)
+
+
+def _update_deltas(collection: str, before: dict, changes: dict) -> Counter:
+    # Only counted fields that actually change produce a delta
+    if not any(field in changes and changes[field] != before.get(field) for field in DIMENSIONS[collection]):
+        return Counter()
+    deltas = _deltas(collection, before, -1)
+    deltas.update(_deltas(collection, {**before, **changes}, 1))
+    return deltas
+
+
+def record_update(collection: str, before: dict, changes: dict):
+    _apply(collection, _update_deltas(collection, before, changes))
+
+
+def record_updates(collection: str, documents: list, changes: dict):
+    # One counter write for a whole bulk update
+    deltas = Counter()
+    for before in documents:
+        deltas.update(_update_deltas(collection, before, changes))
+    _apply(collection, deltas)
+
+
+def read_stats() -> dict:
+    result = {collection: {"total": 0, **{f"by_{field}": {} for field in fields}} for collection, fields in DIMENSIONS.items()}
+    for counter in read_db.stats.find():
+        key = counter["_id"]
+        if key["collection"] not in result or counter["count"] == 0:
+            continue
+        if key["field"] == "total":
+            result[key["collection"]]["total"] = counter["count"]
+        else:
+            value = "unknown" if key["value"] is None else str(key["value"])
+            result[key["collection"]][f"by_{key['field']}"][value] = counter["count"]
+    return result
+
+
+def reconcile():
+    # Recomputes every counter from the live documents and removes ones that no longer apply
+    for collection, fields in DIMENSIONS.items():
+        facets = {field: [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}] for field in fields}
+        facets["total"] = [{"$count": "count"}]
+        result = next(db[collection].aggregate([{"$match": ACTIVE}, {"$facet": facets}]))
+
+        counters = {("total", None): result["total"][0]["count"] if result["total"] else 0}
+        for field in fields:
+            for group in result[field]:
+                counters[(field, group["_id"])] = group["count"]
+
+        operations = [
+            ReplaceOne({"_id": _counter_id(collection, field, value)}, {"count": count}, upsert=True)
+            for (field, value), count in counters.items()
+        ]
+        db.stats.bulk_write(operations, ordered=False)
+        db.stats.delete_many({
+            "_id.collection": collection,
+            "_id": {"$nin": [_counter_id(collection, field, value) for field, value in counters]},
+        })
+    logger.info("stats counters reconciled")
+
+
+reconcile_task = None
+if settings.STATS_RECONCILE_INTERVAL_SECONDS > 0:
+    reconcile_task = register(PeriodicTask("stats-reconcile", settings.STATS_RECONCILE_INTERVAL_SECONDS, reconcile))
+
+
+def request_reconcile():
+    # Used when a write could not be counted exactly; the periodic job fixes it on its next run
+    if reconcile_task is not None:
+        reconcile_task.wake()